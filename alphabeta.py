@@ -0,0 +1,307 @@
+import time
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from engine import CELL_COORDS, WIN_TABLE, BitBoard
+from evaluate import evaluate_position
+from mcts import to_engine
+
+WIN_SCORE = 100000
+# scores from MATE_SCORE on are wins or losses, WIN_SCORE minus the plies
+# until the end of the game
+MATE_SCORE = WIN_SCORE - 81
+
+# flags of transposition table entries
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# weight of a position inside a table, the center is part of most lines
+_POS_WEIGHT = (3, 2, 3, 2, 4, 2, 3, 2, 3)
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time limit is exceeded"""
+
+    pass
+
+
+def to_tt_value(value: int, ply: int) -> int:
+    """Win and loss scores of the search count plies from the root, in the
+        transposition table they count from the stored position.
+    """
+    if value >= MATE_SCORE:
+        return value + ply
+    if value <= -MATE_SCORE:
+        return value - ply
+    return value
+
+
+def from_tt_value(value: int, ply: int) -> int:
+    """Inverse of to_tt_value for a position probed at ply"""
+    if value >= MATE_SCORE:
+        return value - ply
+    if value <= -MATE_SCORE:
+        return value + ply
+    return value
+
+
+class TranspositionTable:
+    """ Fixed size transposition table. Every slot holds one entry
+        (hash, depth, value, flag, move, generation) and is addressed by the
+        low bits of the Zobrist hash. A new entry replaces the stored one if
+        the stored entry belongs to an older search, has the same hash or
+        was searched less deep, so the memory stays capped and deep results
+        of the current search survive.
+
+    Keyword Arguments:
+        size_bits {int} -- the table has 2 ** size_bits slots
+                           (default: {20})
+    """
+
+    def __init__(self, size_bits: int = 20):
+        self.mask = (1 << size_bits) - 1
+        self.slots: List[Optional[Tuple]] = [None] * (1 << size_bits)
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def new_search(self):
+        """Age the stored entries and reset the statistics"""
+        self.generation += 1
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def probe(self, key: int) -> Optional[Tuple]:
+        self.probes += 1
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key: int, depth: int, value: int, flag: int, move: int):
+        index = key & self.mask
+        entry = self.slots[index]
+        if (
+            entry is None
+            or entry[5] != self.generation
+            or entry[0] == key
+            or entry[1] <= depth
+        ):
+            self.slots[index] = (key, depth, value, flag, move, self.generation)
+            self.stores += 1
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+
+class AlphaBetaResult(NamedTuple):
+    """Outcome of a search
+
+    move {Tuple[int, int]} -- best move as (table number, table position)
+    value {int} -- score of the best move for the side to move
+    depth {int} -- depth of the last completed iteration
+    nodes {int} -- number of searched nodes
+    seconds {float} -- duration of the search
+    tt_hit_rate {float} -- share of transposition table probes with a hit
+    """
+
+    move: Optional[Tuple[int, int]]
+    value: int
+    depth: int
+    nodes: int
+    seconds: float
+    tt_hit_rate: float
+
+    @property
+    def nodes_per_sec(self) -> float:
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+
+class AlphaBeta:
+    """ Deterministic negamax search with alpha-beta pruning, iterative
+        deepening and a transposition table keyed by the engine's Zobrist
+        hash. Moves are ordered by the transposition table move, moves which
+        win a table and moves which don't give the opponent a free choice.
+
+    Keyword Arguments:
+        tt_bits {int} -- the transposition table has 2 ** tt_bits slots
+                         (default: {20})
+        evaluator {Callable} -- static score of a BitBoard for the side to
+                                move (default: {evaluate_position})
+    """
+
+    def __init__(
+        self,
+        tt_bits: int = 20,
+        evaluator: Callable[[BitBoard], int] = evaluate_position,
+    ):
+        self.tt = TranspositionTable(tt_bits)
+        self.evaluator = evaluator
+        self.nodes = 0
+        self.deadline: Optional[float] = None
+        self.root_move: Optional[int] = None
+
+    def search(
+        self, position, max_depth: int = None, time_limit: float = None
+    ) -> AlphaBetaResult:
+        """Search the best move for the side to move.
+
+        Arguments:
+            position -- Board, BitBoard or (board_dict, insertion_order)
+
+        Keyword Arguments:
+            max_depth {int} -- deepest iteration (default: {None})
+            time_limit {float} -- seconds to search, the result of the last
+                                  completed iteration is returned
+                                  (default: {None})
+                                  depth 4 is searched if neither max_depth
+                                  nor time_limit is set
+
+        Returns:
+            AlphaBetaResult -- best move and search statistics
+        """
+        if max_depth is None:
+            max_depth = 4 if time_limit is None else 81
+        engine = to_engine(position).copy()
+        self.tt.new_search()
+        self.nodes = 0
+        self.root_move = None
+        start = time.perf_counter()
+        self.deadline = None if time_limit is None else start + time_limit
+
+        best_move, best_value, completed = None, 0, 0
+        for depth in range(1, max_depth + 1):
+            try:
+                value = self._negamax(engine, depth, -WIN_SCORE - 1, WIN_SCORE + 1)
+            except SearchTimeout:
+                break
+            best_move, best_value, completed = self.root_move, value, depth
+            if abs(value) >= MATE_SCORE:
+                # the game result is known
+                break
+        seconds = time.perf_counter() - start
+
+        if best_move is None and engine.winner() is None:
+            # not even the first iteration completed
+            moves = self._ordered_moves(engine, -1)
+            best_move = moves[0] if moves else None
+        return AlphaBetaResult(
+            CELL_COORDS[best_move] if best_move is not None else None,
+            best_value,
+            completed,
+            self.nodes,
+            seconds,
+            self.tt.hit_rate,
+        )
+
+    def _ordered_moves(self, engine: BitBoard, tt_move: int) -> List[int]:
+        side = engine.turn
+        marks = engine.marks[side]
+        finished = engine.finished
+
+        def order(cell: int) -> int:
+            if cell == tt_move:
+                return -1000
+            tbl, pos = cell // 9, cell % 9
+            score = _POS_WEIGHT[pos]
+            if WIN_TABLE[marks[tbl] | 1 << pos]:
+                score += 100
+            elif finished >> pos & 1:
+                # the opponent may play in any table
+                score -= 10
+            return -score
+
+        return sorted(engine.legal_moves(), key=order)
+
+    def _negamax(
+        self, engine: BitBoard, depth: int, alpha: int, beta: int, ply: int = 0
+    ) -> int:
+        self.nodes += 1
+        if self.deadline is not None and not self.nodes & 1023:
+            if time.perf_counter() > self.deadline:
+                raise SearchTimeout()
+
+        if engine.winner() is not None:
+            # the side which played the last move won
+            return -WIN_SCORE + ply
+        moves_left = engine.legal_moves()
+        if not moves_left:
+            return 0
+        if depth == 0:
+            return self.evaluator(engine)
+
+        alpha_orig = alpha
+        key = engine.hash
+        entry = self.tt.probe(key)
+        tt_move = -1
+        if entry is not None:
+            tt_move = entry[4]
+            if entry[1] >= depth and ply > 0:
+                value, flag = from_tt_value(entry[2], ply), entry[3]
+                if flag == EXACT:
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                elif flag == UPPER:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        best_value, best_move = -WIN_SCORE - 1, -1
+        for cell in self._ordered_moves(engine, tt_move):
+            engine.push(cell)
+            try:
+                value = -self._negamax(engine, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                engine.pop()
+            if value > best_value:
+                best_value, best_move = value, cell
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                break
+
+        if best_value <= alpha_orig:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, to_tt_value(best_value, ply), flag, best_move)
+        if ply == 0:
+            self.root_move = best_move
+        return best_value
+
+
+class AlphaBetaPlayer:
+    """Player callable which returns the move of an alpha-beta search.
+
+    Keyword Arguments:
+        max_depth {int} -- deepest iteration (default: {None})
+        time_limit {float} -- seconds per move (default: {None})
+        book {book.OpeningBook} -- opening book which is consulted before
+                                   the search (default: {None})
+    """
+
+    def __init__(self, max_depth: int = None, time_limit: float = None, book=None):
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.searcher = AlphaBeta()
+        self.book = book
+        self.last_result: Optional[AlphaBetaResult] = None
+
+    def __call__(self, board) -> Optional[Tuple[int, int]]:
+        if self.book is not None:
+            move = self.book.lookup(board)
+            if move is not None:
+                self.last_result = None
+                return move
+        self.last_result = self.searcher.search(
+            board, max_depth=self.max_depth, time_limit=self.time_limit
+        )
+        return self.last_result.move
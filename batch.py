@@ -0,0 +1,267 @@
+from typing import Tuple
+
+import numpy as np
+
+from engine import BIT_INDICES, WIN_TABLE
+
+# Cell and table values of the batch arrays. A side's mark is side + 1, so
+# the values match the sides 0 and 1 of engine.BitBoard.
+EMPTY = 0
+DRAW = 3
+
+# lookup tables over 9-bit masks, WIN holds engine.WIN_TABLE, which tests the
+# 8 lines of board.test_winning
+WIN = np.array(WIN_TABLE, dtype=bool)
+POPCOUNT = np.array([len(bits) for bits in BIT_INDICES], dtype=np.int16)
+FULL, NONE = np.int16(0x1FF), np.int16(0)
+# SELECT[mask, k] is the index of the k-th set bit of mask
+SELECT = np.zeros((512, 9), dtype=np.int16)
+for _mask, _bits in enumerate(BIT_INDICES):
+    SELECT[_mask, : len(_bits)] = _bits
+# BYTE_CELLS[byte] are the values of the 4 cells packed into a byte of an
+# encoded position, see codec.encode_position
+BYTE_CELLS = (np.arange(256)[:, None] >> np.array([0, 2, 4, 6]) & 3).astype(np.int8)
+BITS = (1 << np.arange(9)).astype(np.int16)
+
+
+class BatchGames:
+    """ N games played in lockstep on NumPy arrays. cells has shape (N, 9, 9)
+        with cells[game, tbl, pos] in {EMPTY, 1, 2}, finished has shape (N, 9)
+        with the mark of the side which won a table or DRAW for a full table
+        nobody won. Every step applies one
+        move to every game which is not over.
+
+        Besides these arrays the occupied positions of every table and the
+        won tables are kept as 9-bit masks, so win checks and the choice of
+        random moves are lookups on (N, 9) arrays instead of work on all
+        81 cells.
+
+    Arguments:
+        n {int} -- number of games
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.cells = np.zeros((n, 9, 9), dtype=np.int8)
+        self.finished = np.zeros((n, 9), dtype=np.int8)
+        # marks[game, side, tbl] -> 9-bit mask of the positions of side
+        self.marks = np.zeros((n, 2, 9), dtype=np.int16)
+        # won[game, side] -> 9-bit mask of the tables won by side
+        self.won = np.zeros((n, 2), dtype=np.int16)
+        # table index the next move has to be played in, -1 for any table
+        self.forced = np.full(n, -1, dtype=np.int8)
+        # side to move (0 or 1)
+        self.turn = np.zeros(n, dtype=np.int8)
+        # EMPTY while the game runs, then the winner's mark or DRAW
+        self.result = np.zeros(n, dtype=np.int8)
+        self.plies = np.zeros(n, dtype=np.int16)
+        # cell index (0 .. 80) of every move, -1 after the end of the game
+        self.moves = np.full((n, 81), -1, dtype=np.int8)
+
+    @classmethod
+    def from_positions(cls, positions) -> "BatchGames":
+        """Games in the positions encoded by codec.encode_position, e.g. the
+            records of a RecordReader. The moves array is left empty.
+
+        Arguments:
+            positions -- (N, 22) uint8 array or a sequence of encoded
+                         positions
+
+        Returns:
+            BatchGames -- one game per position
+        """
+        if not isinstance(positions, np.ndarray):
+            positions = np.frombuffer(b"".join(positions), dtype=np.uint8)
+        data = positions.reshape(-1, 22)
+        n = len(data)
+        games = cls(n)
+        games.cells = BYTE_CELLS[data[:, :21]].reshape(n, 84)[:, :81].reshape(n, 9, 9)
+        for side in (0, 1):
+            games.marks[:, side] = (games.cells == side + 1).astype(np.int16) @ BITS
+        won = WIN[games.marks]
+        games.won = won.astype(np.int16) @ BITS
+        full = (games.marks[:, 0] | games.marks[:, 1]) == FULL
+        games.finished = np.where(
+            won[:, 0], 1, np.where(won[:, 1], 2, np.where(full, DRAW, EMPTY))
+        ).astype(np.int8)
+        games.plies = POPCOUNT[games.marks].sum(axis=(1, 2)).astype(np.int16)
+
+        rows = np.arange(n)
+        last = data[:, 21].astype(np.intp)
+        played = last != 255
+        tbl, pos = np.where(played, last // 9, 0), np.where(played, last % 9, 0)
+        last_side = games.cells[rows, tbl, pos] - 1
+        games.turn = np.where(played, 1 - last_side, 0).astype(np.int8)
+        free_table = games.finished[rows, pos] == EMPTY
+        games.forced = np.where(played & free_table, pos, -1).astype(np.int8)
+
+        for side in (0, 1):
+            games.result[WIN[games.won[:, side]]] = side + 1
+        running = np.flatnonzero(games.active)
+        games.result[running[~games._free(running).any(axis=1)]] = DRAW
+        return games
+
+    @property
+    def active(self) -> np.ndarray:
+        return self.result == EMPTY
+
+    def _free(self, games: np.ndarray) -> np.ndarray:
+        """(len(games), 9) masks of the free positions of the tables the
+            side to move may play in.
+        """
+        forced = self.forced[games, None]
+        allowed = (self.finished[games] == EMPTY) & (
+            (forced == -1) | (forced == np.arange(9)[None, :])
+        )
+        allowed &= (self.result[games] == EMPTY)[:, None]
+        marks = self.marks[games]
+        return ~(marks[:, 0] | marks[:, 1]) & np.where(allowed, FULL, NONE)
+
+    def legal_mask(self, games: np.ndarray = None) -> np.ndarray:
+        """Legal moves of all games or of the selected games.
+
+        Keyword Arguments:
+            games {np.ndarray} -- indices of the games (default: {None})
+
+        Returns:
+            np.ndarray -- (N, 9, 9) bool, True for legal [game, tbl, pos]
+        """
+        if games is None:
+            games = np.arange(self.n)
+        free = self._free(games)
+        return (free[:, :, None] >> np.arange(9)[None, None, :] & 1).astype(bool)
+
+    def step(self, cells: np.ndarray):
+        """Apply one move per game. Games which are over are skipped.
+
+        Arguments:
+            cells {np.ndarray} -- (N,) cell index (0 .. 80) per game, the
+                                  moves have to be legal
+        """
+        games = np.flatnonzero(self.active)
+        running = self._apply(games, cells[games])
+        # games without a legal move left end in a draw
+        no_moves = ~self._free(running).any(axis=1)
+        self.result[running[no_moves]] = DRAW
+
+    def _apply(self, games: np.ndarray, cells: np.ndarray) -> np.ndarray:
+        """Apply the moves to the selected games and return the games which
+            are not won.
+        """
+        cells = cells.astype(np.intp)
+        tbl, pos = cells // 9, cells % 9
+        sides = self.turn[games].astype(np.intp)
+        marks = (sides + 1).astype(np.int8)
+
+        self.cells[games, tbl, pos] = marks
+        self.moves[games, self.plies[games]] = cells
+        self.plies[games] += 1
+        self.marks[games, sides, tbl] |= (1 << pos).astype(np.int16)
+
+        table_marks = self.marks[games, :, tbl]
+        won = WIN[table_marks[np.arange(len(games)), sides]]
+        won_games, won_sides = games[won], sides[won]
+        self.finished[won_games, tbl[won]] = marks[won]
+        drawn = ~won & ((table_marks[:, 0] | table_marks[:, 1]) == FULL)
+        self.finished[games[drawn], tbl[drawn]] = DRAW
+        self.won[won_games, won_sides] |= (1 << tbl[won]).astype(np.int16)
+        game_won = np.zeros(len(games), dtype=bool)
+        game_won[won] = WIN[self.won[won_games, won_sides]]
+        self.result[games[game_won]] = marks[game_won]
+
+        self.forced[games] = np.where(self.finished[games, pos] == EMPTY, pos, -1)
+        self.turn[games] = 1 - sides
+        return games[~game_won]
+
+    @staticmethod
+    def _random_cells(free: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """Uniformly random cell index per row of free position masks. Rows
+            without a free position get cell index 0.
+        """
+        counts = POPCOUNT[free]
+        cumulative = counts.cumsum(axis=1)
+        picks = (rng.random(len(free)) * cumulative[:, -1]).astype(np.int16)
+        tbl = (cumulative > picks[:, None]).argmax(axis=1)
+        rows = np.arange(len(free))
+        offset = picks - (cumulative[rows, tbl] - counts[rows, tbl])
+        return tbl * 9 + SELECT[free[rows, tbl], offset]
+
+    def random_moves(self, rng: np.random.Generator) -> np.ndarray:
+        """Pick a uniformly random legal move for every game.
+
+        Returns:
+            np.ndarray -- (N,) cell index per game, undefined for games
+                          which are over
+        """
+        return self._random_cells(self._free(np.arange(self.n)), rng)
+
+    def play_random(self, seed: int = None) -> np.ndarray:
+        """Play random moves until all games are over. Only the games which
+            are still running are touched in every step.
+
+        Keyword Arguments:
+            seed {int} -- seed of the random generator (default: {None})
+
+        Returns:
+            np.ndarray -- (N,) result per game, the winner's mark or DRAW
+        """
+        rng = np.random.default_rng(seed)
+        games = np.flatnonzero(self.active)
+        while len(games):
+            free = self._free(games)
+            stuck = ~free.any(axis=1)
+            if stuck.any():
+                self.result[games[stuck]] = DRAW
+                games, free = games[~stuck], free[~stuck]
+            games = self._apply(games, self._random_cells(free, rng))
+        return self.result
+
+
+def query_moves(positions, moves) -> Tuple[np.ndarray, np.ndarray]:
+    """Legality and the next forced table of candidate moves in many
+        positions at once. The rules are those of Board.is_legal_move: the
+        move has to be played in the table of the last move's position,
+        or in any table which is not finished if that table is finished.
+        Like is_legal_move this does not test whether the game is over.
+
+    Arguments:
+        positions -- N positions encoded by codec.encode_position, see
+                     BatchGames.from_positions
+        moves {np.ndarray} -- (N,) or (N, K) candidate cell indices
+                              (0 .. 80) per position, other values are
+                              illegal
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray] -- bool legality and the table index
+                                         the opponent is sent to after the
+                                         move (-1 for any table or an
+                                         illegal move), both shaped like
+                                         moves
+    """
+    games = BatchGames.from_positions(positions)
+    moves = np.asarray(moves)
+    cells = moves.reshape(games.n, -1).astype(np.intp)
+    valid = (cells >= 0) & (cells < 81)
+    cells = np.where(valid, cells, 0)
+    tbl, pos = cells // 9, cells % 9
+    rows = np.arange(games.n)[:, None]
+
+    forced = games.forced.astype(np.intp)[:, None]
+    table_marks = games.marks[rows, :, tbl]
+    occupied = table_marks[..., 0] | table_marks[..., 1]
+    legal = (
+        valid
+        & (games.finished[rows, tbl] == EMPTY)
+        & ((forced == -1) | (forced == tbl))
+        & (occupied >> pos & 1 == 0)
+    )
+
+    # a move sends the opponent to a finished table if that table was
+    # finished before or if the move finishes its own table and pos == tbl
+    own = games.marks[rows, games.turn.astype(np.intp)[:, None], tbl] | (1 << pos)
+    finishes = WIN[own] | ((occupied | (1 << pos)) == FULL)
+    sent_to_finished = (games.finished[rows, pos] != EMPTY) | (
+        (pos == tbl) & finishes
+    )
+    next_forced = np.where(legal & ~sent_to_finished, pos, -1).astype(np.int8)
+    return legal.reshape(moves.shape), next_forced.reshape(moves.shape)
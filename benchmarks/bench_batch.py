@@ -0,0 +1,42 @@
+"""Random playout throughput of Board against the NumPy batch engine.
+    Run from the repository root:
+
+        python -m benchmarks.bench_batch [batch_size]
+"""
+import random
+import sys
+import time
+
+from batch import BatchGames
+from board import Board
+
+
+def board_games_per_sec(games: int = 200, seed: int = 0) -> float:
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    for _ in range(games):
+        board = Board()
+        while not board.player_won_game():
+            moves = board.legal_moves()
+            if not moves:
+                break
+            board.push(*rng.choice(moves))
+    return games / (time.perf_counter() - start)
+
+
+def batch_games_per_sec(n: int = 10000, seed: int = 0) -> float:
+    start = time.perf_counter()
+    BatchGames(n).play_random(seed)
+    return n / (time.perf_counter() - start)
+
+
+def main(batch_size: int = 10000):
+    board_rate = board_games_per_sec()
+    batch_rate = batch_games_per_sec(batch_size)
+    print(f"Board.push          {board_rate:10.0f} games/sec")
+    print(f"BatchGames({batch_size})  {batch_rate:10.0f} games/sec")
+    print(f"speedup             {batch_rate / board_rate:10.1f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,59 @@
+"""Boards per second of the Board constructors on random positions: __init__,
+    Board.validated and Board.from_trusted from dicts, Board.set_board and
+    Board.from_encoding from encoded positions. Run from the repository
+    root:
+
+        python -m benchmarks.bench_construct [positions]
+"""
+import sys
+import time
+from copy import deepcopy
+from typing import Callable, List
+
+from benchmarks.suite import random_positions
+from board import Board
+from codec import encode_position, position_to_board_args
+
+
+def boards_per_sec(build: Callable, inputs: List, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        # __init__ overwrites won tables, every run gets fresh dicts
+        copies = deepcopy(inputs)
+        start = time.perf_counter()
+        for args in copies:
+            build(*args)
+        best = min(best, time.perf_counter() - start)
+    return len(inputs) / best
+
+
+def main(count: int = 1000):
+    positions = random_positions(count)
+    boards = [
+        Board(board_dict=deepcopy(state), insertion_order=order)
+        for state, order in positions
+    ]
+    trusted = [(b.state, b.insertion_order, b.finished_tables) for b in boards]
+    encoded = [(encode_position(board),) for board in boards]
+
+    init_rate = boards_per_sec(
+        lambda state, order: Board(board_dict=state, insertion_order=order), positions
+    )
+    rates = [
+        ("Board(board_dict)", init_rate),
+        ("Board.validated", boards_per_sec(Board.validated, positions)),
+        ("Board.from_trusted", boards_per_sec(Board.from_trusted, trusted)),
+        (
+            "Board.set_board",
+            boards_per_sec(
+                lambda data: Board.set_board(**position_to_board_args(data)), encoded
+            ),
+        ),
+        ("Board.from_encoding", boards_per_sec(Board.from_encoding, encoded)),
+    ]
+    for name, rate in rates:
+        print(f"{name:<20} {rate:10.0f} boards/sec  {rate / init_rate:6.2f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,37 @@
+"""Playouts per second of root parallel MCTS from 1 to N worker processes.
+    Run from the repository root:
+
+        python -m benchmarks.bench_parallel_mcts [max_workers] [seconds]
+"""
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from board import Board
+from parallel_mcts import parallel_search
+
+
+def main(max_workers: int = None, seconds: float = 2.0):
+    max_workers = max_workers or os.cpu_count() or 1
+    board = Board()
+    board.push(5, 5)
+
+    counts = sorted({2 ** i for i in range(max_workers.bit_length())} | {max_workers})
+    base = None
+    for workers in counts:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # start the processes before measuring
+            parallel_search(board, workers, iterations=1, executor=executor)
+            result = parallel_search(
+                board, workers, time_limit=seconds, seed=0, executor=executor
+            )
+        rate = result.playouts_per_sec
+        base = base or rate
+        print(
+            f"workers={workers:<3} playouts/sec={rate:10.0f} "
+            f"speedup={rate / base:5.2f} efficiency={rate / base / workers:5.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main(*(f(arg) for f, arg in zip([int, float], sys.argv[1:])))
@@ -0,0 +1,56 @@
+"""Micro-benchmark of the precomputed win lookup against the former line scan
+    of test_winning. Run from the repository root:
+
+        python -m benchmarks.bench_win_lookup
+"""
+import random
+import timeit
+from typing import Any
+
+from board import test_winning
+from engine import WIN_TABLE
+
+
+def line_scan_test_winning(test_dic: dict, player: Any) -> bool:
+    """test_winning before the lookup table was introduced"""
+    win_chances = [
+        [1, 5, 9],
+        [3, 5, 7],
+        [2, 5, 8],
+        [4, 5, 6],
+        [1, 2, 3],
+        [1, 4, 7],
+        [3, 6, 9],
+        [7, 8, 9],
+    ]
+    for chance in win_chances:
+        if all(map(lambda pos: test_dic[pos] == player, chance)):
+            return True
+    return False
+
+
+def main(number: int = 20000, seed: int = 0):
+    rng = random.Random(seed)
+    tables = [
+        {pos: rng.choice(["X", "O", 0]) for pos in range(1, 10)} for _ in range(64)
+    ]
+    masks = [rng.randrange(512) for _ in range(64)]
+
+    results = {
+        "line_scan(dict)": timeit.timeit(
+            lambda: [line_scan_test_winning(t, "X") for t in tables], number=number
+        ),
+        "test_winning(dict)": timeit.timeit(
+            lambda: [test_winning(t, "X") for t in tables], number=number
+        ),
+        "WIN_TABLE[mask]": timeit.timeit(
+            lambda: [WIN_TABLE[m] for m in masks], number=number
+        ),
+    }
+    calls = number * 64
+    for name, seconds in results.items():
+        print(f"{name:<20} {seconds / calls * 1e9:8.1f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
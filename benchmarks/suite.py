@@ -0,0 +1,253 @@
+"""Reproducible benchmark suite of the Board hot paths. Every benchmark runs
+    on a fixed position corpus built from fixed seeds, the results are
+    written as JSON to track them over time. Run from the repository root:
+
+        python -m benchmarks.suite [--output results.json] [--quick]
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from copy import deepcopy
+from typing import Callable, Dict, List, Tuple
+
+from board import Board, test_winning
+
+SEED = 20200421
+WIN_COMBINATIONS = [
+    [1, 2, 3],
+    [1, 5, 9],
+    [1, 4, 7],
+    [4, 5, 6],
+    [7, 8, 9],
+    [2, 5, 8],
+    [3, 6, 9],
+    [3, 5, 7],
+]
+
+
+def winning_fixtures() -> List[Tuple[Dict, List]]:
+    """The boards of the example_test_boards fixture of test_board.py: one
+        won table per board, for every table and winning combination.
+    """
+    boards = []
+    for tbl_no in range(1, 10):
+        for combination in WIN_COMBINATIONS:
+            board_dict = {i: {j: 0 for j in range(1, 10)} for i in range(1, 10)}
+            for pos_no in combination:
+                board_dict[tbl_no][pos_no] = "X"
+            boards.append((board_dict, []))
+    return boards
+
+
+def random_positions(count: int = 100, seed: int = SEED) -> List[Tuple[Dict, List]]:
+    """Positions of random games after a random number of moves.
+
+    Returns:
+        List[Tuple[Dict, List]] -- board_dict and insertion_order per position
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = Board()
+        for _ in range(rng.randint(1, 60)):
+            moves = board.legal_moves()
+            if not moves or board.player_won_game():
+                break
+            board.push(*rng.choice(moves))
+        positions.append((deepcopy(board.state), deepcopy(board.insertion_order)))
+    return positions
+
+
+def corpus() -> List[Tuple[Dict, List]]:
+    return winning_fixtures() + random_positions()
+
+
+def measure(func: Callable[..., int], repeat: int, setup: Callable = None) -> Dict:
+    """Best of repeat runs of func, which returns its number of operations.
+
+    Keyword Arguments:
+        setup {Callable} -- untimed call before every run, func is called
+                            with its result (default: {None})
+
+    Returns:
+        Dict -- operations, best seconds, ns per operation and ops per second
+    """
+    best, ops = float("inf"), 0
+    for _ in range(repeat):
+        args = (setup(),) if setup is not None else ()
+        start = time.perf_counter()
+        ops = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return {
+        "ops": ops,
+        "seconds": best,
+        "ns_per_op": best / ops * 1e9,
+        "ops_per_sec": ops / best,
+    }
+
+
+def bench_is_legal_move(boards: List[Board]) -> Callable[[], int]:
+    cells = [(tbl_no, pos_no) for tbl_no in range(1, 10) for pos_no in range(1, 10)]
+
+    def run() -> int:
+        for board in boards:
+            for tbl_no, pos_no in cells:
+                board.is_legal_move(tbl_no, pos_no)
+        return len(boards) * len(cells)
+
+    return run
+
+
+def bench_test_winning(boards: List[Board]) -> Callable[[], int]:
+    tables = [board.state[tbl_no] for board in boards for tbl_no in range(1, 10)]
+
+    def run() -> int:
+        for table in tables:
+            test_winning(table, "X")
+            test_winning(table, "O")
+        return 2 * len(tables)
+
+    return run
+
+
+def bench_update_finished_table(boards: List[Board]) -> Callable[[], int]:
+    def run() -> int:
+        for board in boards:
+            for tbl_no in range(1, 10):
+                board.update_finished_table(tbl_no)
+        return 9 * len(boards)
+
+    return run
+
+
+def bench_init(positions: List[Tuple[Dict, List]]) -> Callable[[List], int]:
+    def run(copies: List[Tuple[Dict, List]]) -> int:
+        for state, order in copies:
+            Board(board_dict=state, insertion_order=order)
+        return len(copies)
+
+    return run
+
+
+def bench_str() -> Callable[[List[Board]], int]:
+    def run(boards: List[Board]) -> int:
+        for board in boards:
+            str(board)
+        return len(boards)
+
+    return run
+
+
+def uncached(boards: List[Board]) -> List[Board]:
+    """The boards without their render cache, str renders them from scratch"""
+    for board in boards:
+        board._render_cache = None
+    return boards
+
+
+def rendered_then_moved(positions: List[Tuple[Dict, List]]) -> List[Board]:
+    """Boards of the positions which are rendered once and then get one
+        move, so str re-renders only the changed table.
+    """
+    boards = []
+    for state, order in positions:
+        board = Board(board_dict=deepcopy(state), insertion_order=deepcopy(order))
+        moves = board.legal_moves()
+        if moves and not board.player_won_game():
+            str(board)
+            board.push(*moves[0])
+            boards.append(board)
+    return boards
+
+
+def bench_playouts(games: int, seed: int = SEED) -> Callable[[], int]:
+    def run() -> int:
+        rng = random.Random(seed)
+        for _ in range(games):
+            board = Board()
+            while not board.player_won_game():
+                moves = board.legal_moves()
+                if not moves:
+                    break
+                board.push(*rng.choice(moves))
+        return games
+
+    return run
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_suite(quick: bool = False) -> Dict:
+    """Run all benchmarks.
+
+    Keyword Arguments:
+        quick {bool} -- fewer repetitions and playouts (default: {False})
+
+    Returns:
+        Dict -- metadata and one result per benchmark
+    """
+    repeat = 3 if quick else 7
+    positions = corpus()
+    boards = [
+        Board(board_dict=deepcopy(state), insertion_order=deepcopy(order))
+        for state, order in positions
+    ]
+    results = {
+        "is_legal_move": measure(bench_is_legal_move(boards), repeat),
+        "test_winning": measure(bench_test_winning(boards), repeat),
+        "update_finished_table": measure(bench_update_finished_table(boards), repeat),
+        # Board takes ownership of board_dict, so the copies are untimed
+        "Board.__init__": measure(
+            bench_init(positions),
+            repeat,
+            setup=lambda: [(deepcopy(state), order) for state, order in positions],
+        ),
+        # cold render, every run starts without the render cache
+        "Board.__str__": measure(bench_str(), repeat, setup=lambda: uncached(boards)),
+        "Board.__str__ after move": measure(
+            bench_str(), repeat, setup=lambda: rendered_then_moved(positions)
+        ),
+        "random_playouts": measure(bench_playouts(20 if quick else 200), repeat),
+    }
+    return {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": SEED,
+        "corpus_size": len(positions),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Board benchmark suite")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--quick", action="store_true", help="short run")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.quick)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,7 +1,12 @@
-import sys
 import random
-from typing import Any, Dict, List
-from copy import deepcopy
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from codec import NO_MOVE, decode_board_dict, decode_position
+from engine import CELL_COORDS, WIN_TABLE, WON, BitBoard, cell_index
+from render import render
+
+# value of finished_tables for a full table which nobody won
+DRAWN_TABLE = "-"
 
 
 class IllegalMoveError(Exception):
@@ -126,32 +131,33 @@ class Board:
                                         (default: {None})
         """
         self.insertions = []
+        self._render_cache = None
         self.playerA = playerA
         self.playerB = playerB
+        self._sides = {playerA: 0, playerB: 1}
 
         # initialize the board with 0 values if no board_dict is given
         if board_dict is None:
             self.state = {i: {j: 0 for j in range(1, 10)} for i in range(1, 10)}
             self.insertion_order = []
             self.finished_tables = {tbl_no: 0 for tbl_no in range(1, 10)}
+            self.engine = BitBoard()
         else:
-            # TODO: add exception for invalid board_dicts
+            # the input is trusted, Board.validated checks it
             self.state = board_dict
             self.insertion_order = insertion_order
             self.finished_tables = {tbl_no: 0 for tbl_no in range(1, 10)}
-            # update finished_tables
+            self.engine = BitBoard.from_board_dict(
+                board_dict, insertion_order, (playerA, playerB)
+            )
+            # update finished_tables and mark won tables as completely
+            # owned by the winner
             for tbl_no in range(1, 10):
-                if self.player_won_at_table(tbl_no, self.playerA):
-                    self.finished_tables[tbl_no] = self.playerA
-                    for tbl_pos in range(1, 10):
-                        self.state[tbl_no][tbl_pos] = self.playerA
-                elif self.player_won_at_table(tbl_no, self.playerB):
-                    self.finished_tables[tbl_no] = self.playerB
+                self.update_finished_table(tbl_no)
+                player = self.finished_tables[tbl_no]
+                if player in self._sides:
                     for tbl_pos in range(1, 10):
-                        self.state[tbl_no][tbl_pos] = self.playerB
-
-            # modify finished_tables
-            # tmp_dic = {tbl_no: }
+                        self.state[tbl_no][tbl_pos] = player
 
     @classmethod
     def set_board(
@@ -168,117 +174,232 @@ class Board:
             insertion_order=insertion_order,
         )
 
-    def __str__(self):
-        """ Print out the current board state
+    @classmethod
+    def _from_parts(
+        cls,
+        playerA: str,
+        playerB: str,
+        state: Dict,
+        insertion_order: List,
+        finished_tables: Dict,
+        engine: BitBoard,
+    ) -> "Board":
+        """Board of already consistent parts, __init__ is skipped"""
+        board = cls.__new__(cls)
+        board.insertions = []
+        board._render_cache = None
+        board.playerA = playerA
+        board.playerB = playerB
+        board._sides = {playerA: 0, playerB: 1}
+        board.state = state
+        board.insertion_order = insertion_order
+        board.finished_tables = finished_tables
+        board.engine = engine
+        return board
+
+    @classmethod
+    def from_trusted(
+        cls,
+        board_dict: Dict,
+        insertion_order: List,
+        finished_tables: Dict,
+        playerA: str = "X",
+        playerB: str = "O",
+    ) -> "Board":
+        """Fast constructor for boards which are known to be consistent,
+            e.g. saved from another Board. finished_tables is taken as
+            given, so no table is tested for a win and won tables are not
+            overwritten. Nothing is validated.
+
+        Arguments:
+            board_dict {Dict} -- board state, see __init__
+            insertion_order {List} -- moves as [tbl_no, pos_no, ...] lists
+            finished_tables {Dict} -- {tbl_no: winner label, DRAWN_TABLE or 0}
+
+        Keyword Arguments:
+            playerA {str} -- label of the player which moves first
+                             (default: {"X"})
+            playerB {str} -- label of the other player (default: {"O"})
+
+        Returns:
+            Board -- board sharing the given dicts and list
         """
-        x = deepcopy(self.state)
+        sides = {playerA: 0, playerB: 1}
+        engine = BitBoard()
+        marks = engine.marks
+        for tbl_no, table in board_dict.items():
+            for pos_no, value in table.items():
+                if value != 0:
+                    marks[sides[value]][tbl_no - 1] |= 1 << (pos_no - 1)
+        for tbl_no, value in finished_tables.items():
+            if value in sides:
+                engine.won[sides[value]] |= 1 << (tbl_no - 1)
+            elif value == DRAWN_TABLE:
+                engine.drawn |= 1 << (tbl_no - 1)
+        engine.finished = engine.won[0] | engine.won[1] | engine.drawn
+        engine.game_winner = engine._meta_winner()
+
+        if insertion_order:
+            engine.ply = len(insertion_order)
+            last_tbl, last_pos = insertion_order[-1][0], insertion_order[-1][1]
+            if not engine.is_finished(last_pos - 1):
+                engine.forced = last_pos - 1
+            engine.turn = 1 - sides[board_dict[last_tbl][last_pos]]
+        engine.hash = engine.compute_hash()
+        return cls._from_parts(
+            playerA, playerB, board_dict, insertion_order, finished_tables, engine
+        )
 
-        for i in range(1, 10):
-            for j in range(1, 10):
-                if x[i][j] == 0:
-                    x[i][j] = " "
-                else:
+    @classmethod
+    def from_encoding(
+        cls, data: bytes, playerA: str = "X", playerB: str = "O"
+    ) -> "Board":
+        """Constructor from a position of codec.encode_position. The engine
+            and the dict are built straight from the bytes in one pass
+            without the table scans of __init__. The insertion_order only
+            holds the last move, won tables keep the marks as played.
+
+        Arguments:
+            data {bytes} -- encoded position
+
+        Keyword Arguments:
+            playerA {str} -- label of side 0 (default: {"X"})
+            playerB {str} -- label of side 1 (default: {"O"})
+
+        Returns:
+            Board -- board of the position
+        """
+        engine = decode_position(data)
+        won_a, won_b, drawn = engine.won[0], engine.won[1], engine.drawn
+        finished_tables = {}
+        for tbl in range(9):
+            bit = 1 << tbl
+            if won_a & bit:
+                finished_tables[tbl + 1] = playerA
+            elif won_b & bit:
+                finished_tables[tbl + 1] = playerB
+            elif drawn & bit:
+                finished_tables[tbl + 1] = DRAWN_TABLE
+            else:
+                finished_tables[tbl + 1] = 0
+        last = data[21]
+        return cls._from_parts(
+            playerA,
+            playerB,
+            decode_board_dict(data, (playerA, playerB)),
+            [] if last == NO_MOVE else [list(CELL_COORDS[last])],
+            finished_tables,
+            engine,
+        )
+
+    @classmethod
+    def validated(
+        cls,
+        board_dict: Dict,
+        insertion_order: List,
+        playerA: str = "X",
+        playerB: str = "O",
+    ) -> "Board":
+        """Constructor which checks the input before it builds the board:
+            the dict has to hold the tables and positions 1 to 9 with
+            player labels or 0, the mark counts of the players may differ
+            by at most one and insertion_order has to list every mark once,
+            in alternating player order, as legal moves from the empty board
+            which end in the given dict.
+
+        Arguments:
+            board_dict {Dict} -- board state as played, see __init__
+            insertion_order {List} -- all moves as [tbl_no, pos_no, ...] lists
+
+        Keyword Arguments:
+            playerA {str} -- label of side 0 (default: {"X"})
+            playerB {str} -- label of side 1 (default: {"O"})
+
+        Raises:
+            IllegalInputError: if the board is malformed or not reachable
+
+        Returns:
+            Board -- board built by __init__
+        """
+        sides = {playerA: 0, playerB: 1}
+        if set(board_dict) != set(range(1, 10)) or any(
+            set(table) != set(range(1, 10)) for table in board_dict.values()
+        ):
+            raise IllegalInputError("The board needs the tables and positions 1 to 9.")
+        counts = [0, 0]
+        for table in board_dict.values():
+            for value in table.values():
+                if value == 0:
                     continue
-        board_row_str = []
-
-        # table top
-        board_row_str.append("+" + "---+" * 8 + "---+" + "\n")
-        for counter in range(0, 10):
-            # table bottom
-            if counter == 9:
-                board_row_str.append("-" * 37 + "\n")
-            # board_row_str.append 3x3 small tables row-wise
-            elif counter in [0, 3, 6]:
-                board_row_str.append(
-                    (
-                        "".join(
-                            [
-                                "|" + f" {x[j][1]}   {x[j][2]}   {x[j][3]} "
-                                for j in range(counter + 1, counter + 4)
-                            ]
-                            + ["|"]
-                        )
-                    )
-                    + "\n"
+                if value not in sides:
+                    raise IllegalInputError(f"Unknown player label ({value}).")
+                counts[sides[value]] += 1
+        if abs(counts[0] - counts[1]) > 1:
+            raise IllegalInputError(f"Mark counts {counts} differ by more than 1.")
+        if len(insertion_order) != counts[0] + counts[1]:
+            raise IllegalInputError(
+                f"insertion_order has {len(insertion_order)} moves for "
+                f"{counts[0] + counts[1]} marks."
+            )
+
+        engine = BitBoard()
+        previous = None
+        for ply, entry in enumerate(insertion_order):
+            tbl_no, pos_no = entry[0], entry[1]
+            if tbl_no not in range(1, 10) or pos_no not in range(1, 10):
+                raise IllegalInputError(f"Move {ply + 1} is out of range.")
+            label = board_dict[tbl_no][pos_no]
+            if label == 0 or (len(entry) > 2 and entry[2] != label):
+                raise IllegalInputError(
+                    f"Move {ply + 1} ({tbl_no}-{pos_no}) does not match the board."
                 )
-                board_row_str.append("|" + "   +" * 8 + "   |" + "\n")
-                board_row_str.append(
-                    (
-                        "".join(
-                            [
-                                "|" + f" {x[j][4]}   {x[j][5]}   {x[j][6]} "
-                                for j in range(counter + 1, counter + 4)
-                            ]
-                            + ["|"]
-                        )
-                    )
-                    + "\n"
+            if label == previous:
+                raise IllegalInputError(
+                    f"Player {label} moves twice at move {ply + 1}."
                 )
-                board_row_str.append("|" + "   +" * 8 + "   |" + "\n")
-                board_row_str.append(
-                    (
-                        "".join(
-                            [
-                                "|" + f" {x[j][7]}   {x[j][8]}   {x[j][9]} "
-                                for j in range(counter + 1, counter + 4)
-                            ]
-                            + ["|"]
-                        )
-                        + "\n"
-                    )
+            if engine.winner() is not None or not engine.is_legal(
+                cell_index(tbl_no, pos_no)
+            ):
+                raise IllegalInputError(
+                    f"Move {ply + 1} ({tbl_no}-{pos_no}) is not legal."
                 )
-                board_row_str.append("+" + "---+" * 8 + "---+" + "\n")
-
-        return "".join(board_row_str)
-
-    def is_legal_move(self, tbl_no: int, pos_no: int):
-        if (tbl_no not in range(1, 10)) or (pos_no not in range(1, 10)):
-            return False
+            engine.push(cell_index(tbl_no, pos_no), sides[label])
+            previous = label
+        return cls(playerA, playerB, board_dict, insertion_order)
 
-        # init condition if board is empty
-        if not self.insertion_order:
-            return True
+    def __str__(self):
+        """ Print out the current board state. The text is cached and only
+            the tables changed by a move are rendered again, see render.render.
+        """
+        return render(self)
 
-        # False when you try to insert in a finished table
-        if self.finished_tables[tbl_no] is not 0:
-            return False
+    def is_legal_move(self, tbl_no: int, pos_no: int) -> bool:
+        """Test if a move to table position pos_no at table tbl_no respects
+            the rules. The next move has to be played in the table with the
+            number of the last move's position. If this table is already
+            finished the move may be played in any table which is not finished.
 
-        # True if the tbl_no you shall insert is already finished
-        # but the insertion is in general possible
-        last_pos = self.insertion_order[-1][1]
-        if self.finished_tables[last_pos] is not 0:
-            if self.state[tbl_no][pos_no] is 0:
-                return True
-            else:
-                return False
+        Arguments:
+            tbl_no {int} -- table number
+            pos_no {int} -- table position
 
-        # if table position is already used
-        if self.is_used_tbl_pos(tbl_no, pos_no):
+        Returns:
+            bool -- True if the move is legal
+        """
+        if (tbl_no not in range(1, 10)) or (pos_no not in range(1, 10)):
             return False
 
-        # test if table from current move == position no from last move
-        if self.last_move_pos_eq_tbl_no(tbl_no):
+        return self.engine.is_legal(cell_index(tbl_no, pos_no))
 
-            # insert in finished tbl
-            if self.is_finished_tbl(tbl_no):
-                return False
-            else:
-                return True
+    def legal_moves(self) -> List[Tuple[int, int]]:
+        """All legal moves for the next player, computed in one pass from
+            the forced table rule instead of testing every position with
+            is_legal_move.
 
-        # If the current tbl_no is not equal to the pos_no from last  move it migth
-        # be a legal move if the required tbl to insert is already finished
-        else:
-            # must insert in finished tbl
-            if self.force_insert_in_finished_table():
-
-                # insert in finished tbl
-                if self.is_finished_tbl(tbl_no):
-                    return False
-                else:
-                    return True
-
-            else:
-                return False
+        Returns:
+            List[Tuple[int, int]] -- (table number, table position) tuples
+        """
+        return [CELL_COORDS[cell] for cell in self.engine.legal_moves()]
 
     def force_insert_in_finished_table(self) -> bool:
         """Returns True if the last move forces user to do the next move into 
@@ -345,42 +466,59 @@ class Board:
         if tbl_no not in range(1, 10):
             raise IllegalMoveError("Table number must be between 1 and 9.")
 
-        # get current state for selected talble
-        tbl_dict: dict = self.state[tbl_no]
-
-        return test_winning(tbl_dict, player)
+        side = self._sides.get(player)
+        if side is None:
+            return False
+        return WIN_TABLE[self.engine.marks[side][tbl_no - 1]]
 
     def player_won_game(self) -> bool:
         # test if playerA or playerB won the game on the current board state
-        playerA_won = test_winning(self.finished_tables, self.playerA)
-        playerB_won = test_winning(self.finished_tables, self.playerB)
-
-        if playerA_won | playerB_won:
-            return True
-        else:
-            return False
+        return self.engine.winner() is not None
 
     def get_winner(self):
-        if test_winning(self.finished_tables, self.playerA):
-            return self.playerA
-        elif test_winning(self.finished_tables, self.playerB):
-            return self.playerB
+        winner = self.engine.winner()
+        if winner is not None:
+            return (self.playerA, self.playerB)[winner]
 
     def update_finished_table(self, tbl_no: int):
         """This function updates the finished tables. After each 
-            player's move it's required to test fornew finished tables."""
+            player's move it's required to test fornew finished tables.
+            The engine tracks won and drawn tables incrementally, so this
+            only copies the status of one table into finished_tables."""
 
-        if self.player_won_at_table(tbl_no, self.playerA):
+        engine = self.engine
+        bit = 1 << (tbl_no - 1)
+        if engine.won[0] & bit:
             self.finished_tables[tbl_no] = self.playerA
-        elif self.player_won_at_table(tbl_no, self.playerB):
+        elif engine.won[1] & bit:
             self.finished_tables[tbl_no] = self.playerB
+        elif engine.drawn & bit:
+            self.finished_tables[tbl_no] = DRAWN_TABLE
+
+    def next_move(self, tbl_no: int, pos_no: int, player: str) -> Optional[str]:
+        """Play a move for the given player. The move is validated, but
+            nothing is printed, so a Board can be driven in a loop.
 
-    def next_move(self, tbl_no: int, pos_no: int, player: str):
+        Arguments:
+            tbl_no {int} -- table number
+            pos_no {int} -- table position
+            player {str} -- label of the player
+
+        Raises:
+            IllegalMoveError: if the move is not legal
+            IllegalInputError: if the label belongs to no player
+
+        Returns:
+            Optional[str] -- label of the player if the move won the game
+        """
         if not self.is_legal_move(tbl_no, pos_no):
-            print(self)
             raise IllegalMoveError("Illegal Move.")
+        side = self._sides.get(player)
+        if side is None:
+            raise IllegalInputError(f"Unknown player label ({player}).")
 
         # modify board state
+        self.engine.push(cell_index(tbl_no, pos_no), side)
         self.insertion_order.append([tbl_no, pos_no])
         self.state[tbl_no][pos_no] = player
         self.update_finished_table(tbl_no)
@@ -390,8 +528,52 @@ class Board:
             if self.player_won_game():
                 # this player wins the game since the opposite player can't win the
                 # game passively by the opponent's move directly
-                print(f"And the winner is: player {player}")
-                sys.exit()
+                return player
+        return None
+
+    def push(self, tbl_no: int, pos_no: int):
+        """Play a move for the player whose turn it is. Unlike next_move
+            the player is not given, the move can be taken back with pop.
+
+        Arguments:
+            tbl_no {int} -- table number
+            pos_no {int} -- table position
+
+        Raises:
+            IllegalMoveError: if the move is not legal
+        """
+        if not self.is_legal_move(tbl_no, pos_no):
+            raise IllegalMoveError("Illegal Move.")
+        engine = self.engine
+        player = self.playerB if engine.turn else self.playerA
+        engine.push(cell_index(tbl_no, pos_no))
+        self.insertion_order.append([tbl_no, pos_no])
+        self.state[tbl_no][pos_no] = player
+        finished_table = engine.history[-1][4]
+        if finished_table:
+            self.finished_tables[tbl_no] = (
+                player if finished_table == WON else DRAWN_TABLE
+            )
+
+    def pop(self) -> Tuple[int, int]:
+        """Take back the last move played by push or next_move.
+
+        Raises:
+            IllegalMoveError: if there is no move to take back
+
+        Returns:
+            Tuple[int, int] -- (table number, table position) of the move
+        """
+        engine = self.engine
+        if not engine.history:
+            raise IllegalMoveError("No move to take back.")
+        finished_table = engine.history[-1][4]
+        tbl_no, pos_no = CELL_COORDS[engine.pop()]
+        self.insertion_order.pop()
+        self.state[tbl_no][pos_no] = 0
+        if finished_table:
+            self.finished_tables[tbl_no] = 0
+        return tbl_no, pos_no
 
     def test_legal_move(self, tbl_no: int, tbl_pos: int):
         print(f"Table no.: {tbl_no} \t - Table_pos: {tbl_pos}")
@@ -399,25 +581,36 @@ class Board:
 
 
 def test_winning(test_dic: dict, player: Any) -> bool:
+    """Test if a player owns one of the winning lines in a table dict.
 
-    # all possible cases to win in a table
-    win_chances = [
-        [1, 5, 9],
-        [3, 5, 7],
-        [2, 5, 8],
-        [4, 5, 6],
-        [1, 2, 3],
-        [1, 4, 7],
-        [3, 6, 9],
-        [7, 8, 9],
-    ]
-    for chance in win_chances:
-        if all(map(lambda pos: test_dic[pos] == player, chance)):
-            return True
-    return False
-
+    Arguments:
+        test_dic {dict} -- dict with positions 1 to 9 as keys, like a table
+                           of Board.state or Board.finished_tables
+        player {Any} -- player to test
 
-def start_new_game():
+    Returns:
+        bool -- True if the player won
+    """
+    mask = 0
+    for pos in range(1, 10):
+        if test_dic[pos] == player:
+            mask |= 1 << (pos - 1)
+    return WIN_TABLE[mask]
+
+
+def start_new_game(
+    opponent: Callable[["Board"], Tuple[int, int]] = None, book=None
+):
+    """Play a game on the command line.
+
+    Keyword Arguments:
+        opponent {Callable} -- computer player which returns the move
+                               (table number, table position) for a Board,
+                               e.g. mcts.MCTSPlayer. The second player is
+                               entered by input if not set (default: {None})
+        book {book.OpeningBook} -- opening book the opponent plays from
+                                   before it searches (default: {None})
+    """
     playerA = input("PlayerA, please select your players label (X / O): ")
     if playerA.upper() not in ["X", "O"]:
         raise IllegalInputError("Your input label must be one X or O!")
@@ -433,21 +626,66 @@ def start_new_game():
 
     stat_hint = """please insert your move in format 'tbl_no-tbl_pos': """
     while True:
+        if not new_board.legal_moves():
+            print("No legal move left, the game ends in a draw.")
+            return
+
+        if opponent is not None and players_order[move_counter] == playerB:
+            move = book.lookup(new_board) if book is not None else None
+            tbl_no, pos_no = move if move is not None else opponent(new_board)
+            print(f"Player {playerB}: {tbl_no}-{pos_no}")
+        else:
+            try:
+                user_input = input(
+                    f"Player {players_order[move_counter]}: {stat_hint}"
+                )
+                tbl_no, pos_no = user_input.split("-")
+                tbl_no = int(tbl_no)
+                pos_no = int(pos_no)
+                assert (tbl_no in range(1, 10)) and (pos_no in range(1, 10))
+            except:
+                print(
+                    "Your input does not match the required format: <1 .. 9>-<1 .. 9>"
+                )
+                continue
+
         try:
-            user_input = input(f"Player {players_order[move_counter]}: {stat_hint}")
-            tbl_no, pos_no = user_input.split("-")
-            tbl_no = int(tbl_no)
-            pos_no = int(pos_no)
-            assert (tbl_no in range(1, 10)) and (pos_no in range(1, 10))
-        except:
-            print("Your input does not match the required format: <1 .. 9>-<1 .. 9>")
+            winner = new_board.next_move(
+                tbl_no, pos_no, players_order[move_counter]
+            )
+        except IllegalMoveError:
+            print(new_board)
+            print(f"The move {tbl_no}-{pos_no} is not allowed, please try again.")
             continue
-
-        new_board.next_move(tbl_no, pos_no, players_order[move_counter])
         move_counter = (move_counter + 1) % 2
         print(new_board)
+        if winner is not None:
+            print(f"And the winner is: player {winner}")
+            return
 
 
 if __name__ == "__main__":
-
-    start_new_game()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ultimate Tic-Tac-Toe")
+    parser.add_argument(
+        "--mcts",
+        type=int,
+        metavar="ITERATIONS",
+        help="play against the MCTS player with ITERATIONS playouts per move",
+    )
+    parser.add_argument(
+        "--book", metavar="PATH", help="opening book of the MCTS player"
+    )
+    args = parser.parse_args()
+
+    opponent = book = None
+    if args.mcts:
+        from mcts import MCTSPlayer
+
+        opponent = MCTSPlayer(iterations=args.mcts)
+        if args.book:
+            from book import OpeningBook
+
+            book = OpeningBook(args.book)
+    start_new_game(opponent, book)
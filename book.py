@@ -0,0 +1,226 @@
+import mmap
+import os
+import random
+import struct
+import sys
+from typing import Dict, Optional, Tuple
+
+from alphabeta import AlphaBeta
+from engine import CELL_COORDS, BitBoard, cell_index
+from symmetry import CELL_PERMS, INVERSE, canonicalize
+
+# A book file starts with MAGIC, a version byte and the number of slot bits,
+# followed by 2 ** slot_bits slots. A slot holds the canonical position hash
+# as little endian uint64 (0 for an empty slot) and the best move of the
+# canonical position as cell index. Lookups probe linearly from the slot of
+# the low hash bits, the table is at most half full.
+MAGIC = b"UTTB"
+VERSION = 1
+_HEADER = struct.Struct("<4sBB")
+_SLOT = struct.Struct("<QB")
+
+
+class BookError(Exception):
+    """Raised when a file is no opening book"""
+
+    pass
+
+
+def _slot_key(key: int) -> int:
+    # 0 marks an empty slot
+    return key or 1
+
+
+def build_book(plies: int = 2, depth: int = 4, tt_bits: int = 18) -> Dict[int, int]:
+    """Search the best move of every position of the first plies moves.
+        Symmetric positions are searched once.
+
+    Keyword Arguments:
+        plies {int} -- positions up to this number of moves are searched
+                       (default: {2})
+        depth {int} -- alpha-beta search depth (default: {4})
+        tt_bits {int} -- transposition table size (default: {18})
+
+    Returns:
+        Dict[int, int] -- canonical position hash -> best canonical move
+    """
+    searcher = AlphaBeta(tt_bits=tt_bits)
+    entries: Dict[int, int] = {}
+    level = {BitBoard().hash: BitBoard()}
+    for ply in range(plies + 1):
+        next_level = {}
+        for engine in level.values():
+            if engine.is_over():
+                continue
+            result = searcher.search(engine, max_depth=depth)
+            if result.move is not None:
+                entries[engine.hash] = cell_index(*result.move)
+            if ply == plies:
+                continue
+            for cell in engine.legal_moves():
+                engine.push(cell)
+                canonical, _ = canonicalize(engine)
+                next_level.setdefault(canonical.hash, canonical)
+                engine.pop()
+        level = next_level
+    return entries
+
+
+def write_book(entries: Dict[int, int], path: str):
+    """Write the entries of build_book into an opening book file.
+
+    Arguments:
+        entries {Dict[int, int]} -- canonical position hash -> move
+        path {str} -- file to write
+    """
+    slot_bits = max(4, (2 * len(entries)).bit_length())
+    mask = (1 << slot_bits) - 1
+    slots = [None] * (1 << slot_bits)
+    for key, move in entries.items():
+        key = _slot_key(key)
+        index = key & mask
+        while slots[index] is not None:
+            index = (index + 1) & mask
+        slots[index] = (key, move)
+
+    with open(path, "wb") as book_file:
+        book_file.write(_HEADER.pack(MAGIC, VERSION, slot_bits))
+        for slot in slots:
+            book_file.write(_SLOT.pack(*slot) if slot else _SLOT.pack(0, 0))
+
+
+class OpeningBook:
+    """ Memory mapped opening book. A lookup canonicalizes the position,
+        probes the hash table of the file and maps the stored move back to
+        the position.
+
+    Arguments:
+        path {str} -- book file written by write_book
+
+    Raises:
+        BookError: if the file is no opening book
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        self.data = None
+        try:
+            size = os.fstat(self.file.fileno()).st_size
+            if size < _HEADER.size:
+                raise BookError(f"{path} is no opening book.")
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, slot_bits = _HEADER.unpack_from(self.data, 0)
+            if magic != MAGIC or version != VERSION:
+                raise BookError(f"{path} is no opening book of version {VERSION}.")
+            if size != _HEADER.size + (1 << slot_bits) * _SLOT.size:
+                raise BookError(f"{path} does not hold {1 << slot_bits} slots.")
+        except BaseException:
+            self.close()
+            raise
+        self.mask = (1 << slot_bits) - 1
+        self.lookups = 0
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return sum(
+            1
+            for index in range(self.mask + 1)
+            if _SLOT.unpack_from(self.data, _HEADER.size + index * _SLOT.size)[0]
+        )
+
+    def probe(self, key: int) -> Optional[int]:
+        """Move stored for a canonical position hash or None"""
+        key = _slot_key(key)
+        index = key & self.mask
+        for _ in range(self.mask + 1):
+            stored, move = _SLOT.unpack_from(
+                self.data, _HEADER.size + index * _SLOT.size
+            )
+            if stored == key:
+                return move
+            if stored == 0:
+                return None
+            index = (index + 1) & self.mask
+        return None
+
+    def lookup(self, position) -> Optional[Tuple[int, int]]:
+        """Book move for a Board or BitBoard.
+
+        Arguments:
+            position -- Board or BitBoard
+
+        Returns:
+            Tuple[int, int] -- (table number, table position) or None if
+                               the position is not in the book
+        """
+        engine = position if isinstance(position, BitBoard) else position.engine
+        self.lookups += 1
+        canonical, t = canonicalize(engine)
+        move = self.probe(canonical.hash)
+        if move is None:
+            return None
+        cell = CELL_PERMS[INVERSE[t]][move]
+        if not engine.is_legal(cell):
+            return None
+        self.hits += 1
+        return CELL_COORDS[cell]
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self) -> "OpeningBook":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def measure_hit_rate(
+    book: OpeningBook, plies: int, games: int = 1000, seed: int = 0
+) -> float:
+    """Share of the positions of the first plies moves of random games
+        which are found in the book.
+    """
+    rng = random.Random(seed)
+    book.lookups = book.hits = 0
+    for _ in range(games):
+        engine = BitBoard()
+        for _ in range(plies + 1):
+            if engine.is_over():
+                break
+            book.lookup(engine)
+            engine.push(rng.choice(engine.legal_moves()))
+    return book.hit_rate
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Ultimate Tic-Tac-Toe opening book")
+    parser.add_argument("path", help="book file")
+    parser.add_argument("--build", action="store_true", help="build the book")
+    parser.add_argument("--plies", type=int, default=2, help="moves in the book")
+    parser.add_argument("--depth", type=int, default=4, help="search depth")
+    args = parser.parse_args(argv)
+
+    if args.build:
+        start = time.perf_counter()
+        entries = build_book(args.plies, args.depth)
+        write_book(entries, args.path)
+        print(f"positions: {len(entries)}")
+        print(f"build time: {time.perf_counter() - start:.1f} s")
+    print(f"file size: {os.path.getsize(args.path)} bytes")
+    with OpeningBook(args.path) as book:
+        rate = measure_hit_rate(book, args.plies)
+        print(f"hit rate (random games, first {args.plies} plies): {rate:.3f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,335 @@
+import mmap
+import os
+import struct
+from typing import BinaryIO, Dict, Iterator, List, Sequence, Tuple, Union
+
+from engine import (
+    CELL_COORDS,
+    FULL_TABLE,
+    WIN_TABLE,
+    ZOBRIST_FORCED,
+    ZOBRIST_MASKS,
+    ZOBRIST_TURN,
+    ZOBRIST_WON,
+    BitBoard,
+    cell_index,
+)
+
+# A position packs into POSITION_SIZE bytes: 2 bits per cell (0 empty,
+# 1 side 0, 2 side 1) for the 81 cells in cell index order as little endian
+# integer, followed by one byte with the cell index of the last move or
+# NO_MOVE. The last move gives the forced table and the side to move.
+POSITION_SIZE = 22
+NO_MOVE = 255
+
+# A game packs into one byte per move with the cell index of the move.
+
+# Bulk files start with MAGIC, a version byte and the record kind, then
+# every record follows as little endian uint16 length and the record bytes.
+MAGIC = b"UTTT"
+VERSION = 1
+POSITIONS = 0
+GAMES = 1
+# training samples of selfplay.py
+SAMPLES = 2
+_HEADER = struct.Struct("<4sBB")
+_LENGTH = struct.Struct("<H")
+
+# the low bit of the 2-bit field of every cell, _FIELD_MASKS maps the fields
+# of a table with value 1 at these bits to the 9-bit mask of the positions
+_LOW_BITS = sum(1 << (2 * cell) for cell in range(81))
+_TABLE_BITS = (1 << 18) - 1
+_FIELD_MASKS = {
+    sum(1 << (2 * pos) for pos in range(9) if mask >> pos & 1): mask
+    for mask in range(512)
+}
+# _BYTE_FIELDS[byte] -> values of the 4 cells packed into the byte
+_POS_NOS = range(1, 10)
+_BYTE_FIELDS = tuple(
+    tuple(byte >> (2 * i) & 3 for i in range(4)) for byte in range(256)
+)
+
+
+class CodecError(Exception):
+    """Raised when encoded data is not as expected"""
+
+    pass
+
+
+def _engine(position) -> BitBoard:
+    return position if isinstance(position, BitBoard) else position.engine
+
+
+def last_move(position) -> int:
+    """Cell index of the last move of a Board or BitBoard, NO_MOVE for an
+        empty history. An engine without move history gets a cell of the
+        last mover which leads to the same forced table.
+    """
+    if not isinstance(position, BitBoard) and position.insertion_order:
+        tbl_no, pos_no = position.insertion_order[-1][:2]
+        return cell_index(tbl_no, pos_no)
+    engine = _engine(position)
+    if engine.history:
+        return engine.history[-1][0]
+    if engine.ply == 0 and engine.forced == -1:
+        return NO_MOVE
+    marks = engine.marks[1 - engine.turn]
+    for cell in range(81):
+        tbl, pos = cell // 9, cell % 9
+        if not marks[tbl] >> pos & 1:
+            continue
+        if engine.forced == pos or (
+            engine.forced == -1 and engine.finished >> pos & 1
+        ):
+            return cell
+    return NO_MOVE
+
+
+def encode_position(position) -> bytes:
+    """Pack a Board or BitBoard into POSITION_SIZE bytes.
+
+    Arguments:
+        position -- Board or BitBoard
+
+    Returns:
+        bytes -- encoded position
+    """
+    engine = _engine(position)
+    bits = 0
+    for side in (0, 1):
+        value = side + 1
+        for tbl in range(9):
+            mask = engine.marks[side][tbl]
+            while mask:
+                pos = (mask & -mask).bit_length() - 1
+                bits |= value << (2 * (tbl * 9 + pos))
+                mask &= mask - 1
+    return bits.to_bytes(21, "little") + bytes((last_move(position),))
+
+
+def decode_position(data: Union[bytes, memoryview]) -> BitBoard:
+    """Unpack an encoded position into an engine without building dicts.
+        The table status and the hash are computed in the same pass over
+        the tables.
+
+    Arguments:
+        data {bytes} -- POSITION_SIZE bytes
+
+    Raises:
+        CodecError: if the data has the wrong size
+
+    Returns:
+        BitBoard -- engine without move history
+    """
+    if len(data) != POSITION_SIZE:
+        raise CodecError(f"A position has {POSITION_SIZE} bytes, not {len(data)}.")
+    bits = int.from_bytes(data[:21], "little")
+    low, high = bits & _LOW_BITS, bits >> 1 & _LOW_BITS
+    fields_a, fields_b = low & ~high, high & ~low
+
+    engine = BitBoard()
+    marks_a, marks_b = engine.marks
+    won_a = won_b = drawn = key = 0
+    for tbl in range(9):
+        shift = 18 * tbl
+        mask_a = _FIELD_MASKS[fields_a >> shift & _TABLE_BITS]
+        mask_b = _FIELD_MASKS[fields_b >> shift & _TABLE_BITS]
+        marks_a[tbl], marks_b[tbl] = mask_a, mask_b
+        key ^= ZOBRIST_MASKS[0][tbl][mask_a] ^ ZOBRIST_MASKS[1][tbl][mask_b]
+        if WIN_TABLE[mask_a]:
+            won_a |= 1 << tbl
+            key ^= ZOBRIST_WON[0][tbl]
+        elif WIN_TABLE[mask_b]:
+            won_b |= 1 << tbl
+            key ^= ZOBRIST_WON[1][tbl]
+        elif mask_a | mask_b == FULL_TABLE:
+            drawn |= 1 << tbl
+    engine.won = [won_a, won_b]
+    engine.drawn = drawn
+    engine.finished = won_a | won_b | drawn
+    engine.game_winner = engine._meta_winner()
+
+    last = data[21]
+    if last != NO_MOVE:
+        tbl, pos = last // 9, last % 9
+        if not engine.finished >> pos & 1:
+            engine.forced = pos
+        engine.turn = 0 if marks_b[tbl] >> pos & 1 else 1
+        engine.ply = bin(fields_a).count("1") + bin(fields_b).count("1")
+    key ^= ZOBRIST_FORCED[engine.forced + 1]
+    if engine.turn:
+        key ^= ZOBRIST_TURN
+    engine.hash = key
+    return engine
+
+
+def decode_board_dict(
+    data: Union[bytes, memoryview], players: Tuple[str, str] = ("X", "O")
+) -> Dict:
+    """Board dict of an encoded position straight from the bytes, the same
+        dict as decode_position(data).to_board_dict(players).
+
+    Arguments:
+        data {bytes} -- POSITION_SIZE bytes
+
+    Keyword Arguments:
+        players {Tuple[str, str]} -- labels of side 0 and side 1
+                                     (default: {("X", "O")})
+
+    Returns:
+        Dict -- {tbl_no: {pos_no: player | 0}}
+    """
+    labels = (0, players[0], players[1], 0)
+    values = [labels[value] for byte in data[:21] for value in _BYTE_FIELDS[byte]]
+    return {
+        tbl + 1: dict(zip(_POS_NOS, values[9 * tbl : 9 * tbl + 9]))
+        for tbl in range(9)
+    }
+
+
+def position_to_board_args(data: Union[bytes, memoryview]) -> dict:
+    """Keyword arguments for Board.set_board of an encoded position.
+
+    Arguments:
+        data {bytes} -- POSITION_SIZE bytes
+
+    Returns:
+        dict -- board_dict and insertion_order of the position, the
+                insertion_order only holds the last move
+    """
+    if len(data) != POSITION_SIZE:
+        raise CodecError(f"A position has {POSITION_SIZE} bytes, not {len(data)}.")
+    last = data[21]
+    return {
+        "board_dict": decode_board_dict(data),
+        "insertion_order": [] if last == NO_MOVE else [list(CELL_COORDS[last])],
+    }
+
+
+def encode_game(moves: Sequence) -> bytes:
+    """Pack a game into one byte per move.
+
+    Arguments:
+        moves {Sequence} -- cell indices or [tbl_no, pos_no, ...] entries
+                            like Board.insertion_order
+
+    Returns:
+        bytes -- encoded game
+    """
+    return bytes(
+        move if isinstance(move, int) else cell_index(move[0], move[1])
+        for move in moves
+    )
+
+
+def decode_game(data: Union[bytes, memoryview]) -> List[List[int]]:
+    """Unpack a game into the insertion_order format.
+
+    Arguments:
+        data {bytes} -- one byte per move
+
+    Returns:
+        List[List[int]] -- [tbl_no, pos_no] per move
+    """
+    return [list(CELL_COORDS[cell]) for cell in data]
+
+
+class RecordWriter:
+    """ Write length-prefixed records into a bulk file.
+
+    Arguments:
+        path {str} -- file to write
+        kind {int} -- POSITIONS, GAMES or SAMPLES
+
+    Example:
+        with RecordWriter("games.uttt", GAMES) as writer:
+            writer.write(encode_game(board.insertion_order))
+    """
+
+    def __init__(self, path: str, kind: int, append: bool = False):
+        self.kind = kind
+        self.count = 0
+        if append:
+            self.file: BinaryIO = open(path, "ab")
+            if self.file.tell() == 0:
+                self.file.write(_HEADER.pack(MAGIC, VERSION, kind))
+        else:
+            self.file = open(path, "wb")
+            self.file.write(_HEADER.pack(MAGIC, VERSION, kind))
+
+    def write(self, record: bytes):
+        self.file.write(_LENGTH.pack(len(record)))
+        self.file.write(record)
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class RecordReader:
+    """ Read the records of a bulk file. With use_mmap the file is memory
+        mapped instead of read as a whole, every record is copied out of
+        the mapping as bytes when the iteration reaches it.
+
+    Arguments:
+        path {str} -- file to read
+
+    Keyword Arguments:
+        use_mmap {bool} -- memory map the file (default: {True})
+
+    Raises:
+        CodecError: if the file is no bulk file
+    """
+
+    def __init__(self, path: str, use_mmap: bool = True):
+        self.file = open(path, "rb")
+        self.data = b""
+        try:
+            if os.fstat(self.file.fileno()).st_size < _HEADER.size:
+                raise CodecError(f"{path} is no record file.")
+            if use_mmap:
+                self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.data = self.file.read()
+            magic, version, self.kind = _HEADER.unpack_from(self.data, 0)
+            if magic != MAGIC or version != VERSION:
+                raise CodecError(f"{path} is no record file of version {VERSION}.")
+        except BaseException:
+            self.close()
+            raise
+
+    def __iter__(self) -> Iterator[bytes]:
+        offset = _HEADER.size
+        end = len(self.data)
+        while offset < end:
+            (length,) = _LENGTH.unpack_from(self.data, offset)
+            offset += _LENGTH.size
+            if offset + length > end:
+                raise CodecError("Truncated record at the end of the file.")
+            yield self.data[offset : offset + length]
+            offset += length
+
+    def positions(self) -> Iterator[BitBoard]:
+        for record in self:
+            yield decode_position(record)
+
+    def games(self) -> Iterator[List[List[int]]]:
+        for record in self:
+            yield decode_game(record)
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self) -> "RecordReader":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
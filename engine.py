@@ -0,0 +1,475 @@
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# Every table is stored as a 9-bit mask per player. Position p (1 .. 9) of a
+# table is bit (p - 1), table t (1 .. 9) of the board is index (t - 1). A cell
+# on the complete board is addressed as (t - 1) * 9 + (p - 1), i.e. 0 .. 80.
+FULL_TABLE = 0x1FF
+
+
+def _line_mask(positions: Sequence[int]) -> int:
+    mask = 0
+    for pos in positions:
+        mask |= 1 << (pos - 1)
+    return mask
+
+
+# same order as the win_chances in board.test_winning
+WIN_LINES = tuple(
+    _line_mask(line)
+    for line in [
+        [1, 5, 9],
+        [3, 5, 7],
+        [2, 5, 8],
+        [4, 5, 6],
+        [1, 2, 3],
+        [1, 4, 7],
+        [3, 6, 9],
+        [7, 8, 9],
+    ]
+)
+
+
+def cell_index(tbl_no: int, pos_no: int) -> int:
+    """Convert a table number and a table position into a cell index.
+
+    Arguments:
+        tbl_no {int} -- table number (1 .. 9)
+        pos_no {int} -- position inside the table (1 .. 9)
+
+    Returns:
+        int -- cell index (0 .. 80)
+    """
+    return (tbl_no - 1) * 9 + (pos_no - 1)
+
+
+def cell_coords(cell: int) -> Tuple[int, int]:
+    """Convert a cell index into its table number and table position.
+
+    Arguments:
+        cell {int} -- cell index (0 .. 80)
+
+    Returns:
+        Tuple[int, int] -- (table number, table position) both in 1 .. 9
+    """
+    return cell // 9 + 1, cell % 9 + 1
+
+
+# CELL_COORDS[cell] is the (table number, table position) tuple of a cell
+CELL_COORDS = tuple(cell_coords(cell) for cell in range(81))
+
+
+def _has_line(mask: int) -> bool:
+    for line in WIN_LINES:
+        if mask & line == line:
+            return True
+    return False
+
+
+# WIN_TABLE[mask] is True if the 9-bit mask contains one of the winning lines
+WIN_TABLE = tuple(_has_line(mask) for mask in range(512))
+
+# BIT_INDICES[mask] are the indices of the set bits of a 9-bit mask
+BIT_INDICES = tuple(
+    tuple(bit for bit in range(9) if mask >> bit & 1) for mask in range(512)
+)
+
+# TABLE_CELLS[tbl][mask] are the cell indices of the positions in mask at
+# table index tbl
+TABLE_CELLS = tuple(
+    tuple(tuple(tbl * 9 + bit for bit in bits) for bits in BIT_INDICES)
+    for tbl in range(9)
+)
+
+
+# Zobrist keys for the marks of each side per cell, the tables won by each
+# side, the forced table (index 0 if the next move is free) and the side to
+# move. The fixed seed keeps hashes comparable between processes and runs.
+_zobrist_rng = random.Random(20200421)
+ZOBRIST_CELLS = tuple(
+    tuple(_zobrist_rng.getrandbits(64) for cell in range(81)) for side in (0, 1)
+)
+ZOBRIST_WON = tuple(
+    tuple(_zobrist_rng.getrandbits(64) for tbl in range(9)) for side in (0, 1)
+)
+ZOBRIST_FORCED = tuple(_zobrist_rng.getrandbits(64) for forced in range(10))
+ZOBRIST_TURN = _zobrist_rng.getrandbits(64)
+
+
+def _zobrist_masks(side: int, tbl: int) -> Tuple[int, ...]:
+    keys = []
+    for cells in TABLE_CELLS[tbl]:
+        key = 0
+        for cell in cells:
+            key ^= ZOBRIST_CELLS[side][cell]
+        keys.append(key)
+    return tuple(keys)
+
+
+# ZOBRIST_MASKS[side][tbl][mask] is the xor of the cell keys of the positions
+# in mask at table tbl
+ZOBRIST_MASKS = tuple(
+    tuple(_zobrist_masks(side, tbl) for tbl in range(9)) for side in (0, 1)
+)
+
+
+# values of the finished table entry of the move history
+WON = 1
+DRAWN = 2
+
+
+class BitBoard:
+    """ Compact game state for Ultimate Tic-Tac-Toe. The marks of both sides
+        are kept as 9 masks of 9 bits (one mask per table) and the tables won
+        by each side as another 9-bit mask. Side 0 is the Board's playerA
+        and side 1 its playerB.
+
+        The engine knows nothing about player labels, dicts or printing, it
+        only implements the rules. Use Board for the dict based API.
+    """
+
+    __slots__ = (
+        "marks",
+        "won",
+        "drawn",
+        "finished",
+        "game_winner",
+        "forced",
+        "turn",
+        "ply",
+        "history",
+        "hash",
+    )
+
+    def __init__(self):
+        # marks[side][tbl] -> 9-bit mask of the positions taken by side
+        self.marks: List[List[int]] = [[0] * 9, [0] * 9]
+        # won[side] -> 9-bit mask of the tables won by side
+        self.won: List[int] = [0, 0]
+        # 9-bit mask of the full tables which nobody won
+        self.drawn: int = 0
+        # 9-bit mask of the won and drawn tables
+        self.finished: int = 0
+        # side which won the game, None while nobody won
+        self.game_winner: Optional[int] = None
+        # table index (0 .. 8) the next move has to be played in, -1 if
+        # the next move may be played in any table which is not finished
+        self.forced: int = -1
+        # side to move
+        self.turn: int = 0
+        # number of moves played
+        self.ply: int = 0
+        # (cell, side, forced, turn, finished table, hash) for every pushed
+        # move, the state before the move can be restored from it by pop.
+        # finished table is WON or DRAWN if the move finished its table,
+        # else 0.
+        self.history: List[Tuple[int, int, int, int, int, int]] = []
+        # Zobrist hash of the position, updated incrementally by push
+        self.hash: int = ZOBRIST_FORCED[0]
+
+    @classmethod
+    def from_board_dict(
+        cls,
+        board_dict: Dict,
+        insertion_order: List = None,
+        players: Tuple[str, str] = ("X", "O"),
+    ) -> "BitBoard":
+        """Build an engine from the dict based board format used by Board.
+            A table which is won is stored as completely owned by the winner,
+            just like Board overwrites the positions of a won table.
+
+        Arguments:
+            board_dict {Dict} -- {tbl_no: {pos_no: player | 0}}
+
+        Keyword Arguments:
+            insertion_order {List} -- moves as [tbl_no, pos_no, ...] lists
+                                      (default: {None})
+            players {Tuple[str, str]} -- labels of side 0 and side 1
+                                         (default: {("X", "O")})
+
+        Returns:
+            BitBoard -- engine representing the given board
+        """
+        engine = cls()
+        sides = {players[0]: 0, players[1]: 1}
+        for tbl_no, table in board_dict.items():
+            for pos_no, value in table.items():
+                side = sides.get(value)
+                if side is not None:
+                    engine.marks[side][tbl_no - 1] |= 1 << (pos_no - 1)
+
+        for tbl in range(9):
+            for side in (0, 1):
+                if WIN_TABLE[engine.marks[side][tbl]]:
+                    engine.marks[side][tbl] = FULL_TABLE
+                    engine.marks[1 - side][tbl] = 0
+                    break
+        engine.update_status()
+
+        if insertion_order:
+            engine.ply = len(insertion_order)
+            last_tbl, last_pos = insertion_order[-1][0], insertion_order[-1][1]
+            if not engine.is_finished(last_pos - 1):
+                engine.forced = last_pos - 1
+            last_side = sides.get(board_dict[last_tbl][last_pos])
+            if last_side is not None:
+                engine.turn = 1 - last_side
+            else:
+                engine.turn = int(engine.count(0) > engine.count(1))
+        engine.hash = engine.compute_hash()
+        return engine
+
+    def to_board_dict(self, players: Tuple[str, str] = ("X", "O")) -> Dict:
+        """Convert the engine into the dict based board format.
+
+        Keyword Arguments:
+            players {Tuple[str, str]} -- labels of side 0 and side 1
+                                         (default: {("X", "O")})
+
+        Returns:
+            Dict -- {tbl_no: {pos_no: player | 0}}
+        """
+        board_dict = {}
+        for tbl in range(9):
+            mask_a, mask_b = self.marks[0][tbl], self.marks[1][tbl]
+            board_dict[tbl + 1] = {
+                pos + 1: (
+                    players[0]
+                    if mask_a >> pos & 1
+                    else (players[1] if mask_b >> pos & 1 else 0)
+                )
+                for pos in range(9)
+            }
+        return board_dict
+
+    def to_bytes(self) -> bytes:
+        """Serialize the position into 24 bytes: 11 bytes with the 81-bit
+            marks of each side, the forced table and the side to move. The
+            move history is not serialized.
+        """
+        data = bytearray()
+        for marks in self.marks:
+            bits = 0
+            for tbl in range(9):
+                bits |= marks[tbl] << (tbl * 9)
+            data += bits.to_bytes(11, "little")
+        data.append(self.forced + 1)
+        data.append(self.turn)
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, ply: int = 0) -> "BitBoard":
+        """Restore a position serialized by to_bytes.
+
+        Arguments:
+            data {bytes} -- serialized position
+
+        Keyword Arguments:
+            ply {int} -- number of moves played (default: {0})
+
+        Returns:
+            BitBoard -- engine without move history
+        """
+        engine = cls()
+        for side in (0, 1):
+            bits = int.from_bytes(data[side * 11 : side * 11 + 11], "little")
+            marks = engine.marks[side]
+            for tbl in range(9):
+                marks[tbl] = bits >> (tbl * 9) & FULL_TABLE
+        engine.update_status()
+        engine.forced = data[22] - 1
+        engine.turn = data[23]
+        engine.ply = ply
+        engine.hash = engine.compute_hash()
+        return engine
+
+    def copy(self) -> "BitBoard":
+        other = BitBoard.__new__(BitBoard)
+        other.marks = [self.marks[0][:], self.marks[1][:]]
+        other.won = self.won[:]
+        other.drawn = self.drawn
+        other.finished = self.finished
+        other.game_winner = self.game_winner
+        other.forced = self.forced
+        other.turn = self.turn
+        other.ply = self.ply
+        other.history = self.history[:]
+        other.hash = self.hash
+        return other
+
+    def update_status(self):
+        """Compute the won and drawn tables and the winner of the game from
+            the marks. push and pop keep them up to date, this is only
+            required after the marks were set directly.
+        """
+        marks_a, marks_b = self.marks
+        self.won = [0, 0]
+        self.drawn = 0
+        for tbl in range(9):
+            if WIN_TABLE[marks_a[tbl]]:
+                self.won[0] |= 1 << tbl
+            elif WIN_TABLE[marks_b[tbl]]:
+                self.won[1] |= 1 << tbl
+            elif marks_a[tbl] | marks_b[tbl] == FULL_TABLE:
+                self.drawn |= 1 << tbl
+        self.finished = self.won[0] | self.won[1] | self.drawn
+        self.game_winner = self._meta_winner()
+
+    def _meta_winner(self) -> Optional[int]:
+        if WIN_TABLE[self.won[0]]:
+            return 0
+        if WIN_TABLE[self.won[1]]:
+            return 1
+        return None
+
+    def is_finished(self, tbl: int) -> bool:
+        return bool(self.finished >> tbl & 1)
+
+    def count(self, side: int) -> int:
+        """Number of positions taken by side"""
+        return sum(bin(mask).count("1") for mask in self.marks[side])
+
+    def is_legal(self, cell: int) -> bool:
+        """Test if a move to the cell index is legal for the side to move.
+
+        Arguments:
+            cell {int} -- cell index (0 .. 80)
+
+        Returns:
+            bool -- True if the move respects the rules
+        """
+        tbl, bit = cell // 9, 1 << (cell % 9)
+        if self.finished >> tbl & 1:
+            return False
+        if self.forced != -1 and self.forced != tbl:
+            return False
+        return not (self.marks[0][tbl] | self.marks[1][tbl]) & bit
+
+    def open_tables(self) -> Tuple[int, ...]:
+        """Table indices the side to move may play in"""
+        if self.forced != -1:
+            return (self.forced,)
+        return BIT_INDICES[~self.finished & FULL_TABLE]
+
+    def legal_moves(self) -> List[int]:
+        """All legal moves of the side to move as cell indices in ascending
+            order. Only the tables allowed by the forced table rule are
+            visited, and their free positions come from a lookup table.
+
+        Returns:
+            List[int] -- legal cell indices (0 .. 80)
+        """
+        marks_a, marks_b = self.marks
+        moves = []
+        for tbl in self.open_tables():
+            free = ~(marks_a[tbl] | marks_b[tbl]) & FULL_TABLE
+            moves.extend(TABLE_CELLS[tbl][free])
+        return moves
+
+    def legal_mask(self) -> int:
+        """All legal moves of the side to move as 81-bit mask, bit i is set
+            if a move to cell index i is legal.
+        """
+        marks_a, marks_b = self.marks
+        mask = 0
+        for tbl in self.open_tables():
+            mask |= (~(marks_a[tbl] | marks_b[tbl]) & FULL_TABLE) << (tbl * 9)
+        return mask
+
+    def push(self, cell: int, side: int = None):
+        """Put a mark to the cell index without checking the rules. The move
+            can be taken back with pop. Only the table of the move is tested
+            for a win or draw, and the meta board only if the table got won.
+
+        Arguments:
+            cell {int} -- cell index (0 .. 80)
+
+        Keyword Arguments:
+            side {int} -- side which plays the move, the side to move
+                          if not set (default: {None})
+        """
+        if side is None:
+            side = self.turn
+        tbl, pos = cell // 9, cell % 9
+        marks = self.marks[side]
+        marks[tbl] |= 1 << pos
+        if WIN_TABLE[marks[tbl]]:
+            finished_table = WON
+        elif marks[tbl] | self.marks[1 - side][tbl] == FULL_TABLE:
+            finished_table = DRAWN
+        else:
+            finished_table = 0
+        key = self.hash
+        self.history.append(
+            (cell, side, self.forced, self.turn, finished_table, key)
+        )
+        key ^= ZOBRIST_CELLS[side][cell] ^ ZOBRIST_FORCED[self.forced + 1]
+        if finished_table:
+            self.finished |= 1 << tbl
+            if finished_table == WON:
+                self.won[side] |= 1 << tbl
+                key ^= ZOBRIST_WON[side][tbl]
+                if WIN_TABLE[self.won[side]]:
+                    self.game_winner = side
+            else:
+                self.drawn |= 1 << tbl
+        self.forced = -1 if self.finished >> pos & 1 else pos
+        key ^= ZOBRIST_FORCED[self.forced + 1]
+        if self.turn == side:
+            key ^= ZOBRIST_TURN
+        self.hash = key
+        self.turn = 1 - side
+        self.ply += 1
+
+    def pop(self) -> int:
+        """Take back the last pushed move and restore the state before it.
+
+        Raises:
+            IndexError: if there is no move to take back
+
+        Returns:
+            int -- cell index of the move taken back
+        """
+        cell, side, self.forced, self.turn, finished_table, self.hash = (
+            self.history.pop()
+        )
+        tbl = cell // 9
+        self.marks[side][tbl] &= ~(1 << (cell % 9))
+        if finished_table:
+            self.finished &= ~(1 << tbl)
+            if finished_table == WON:
+                self.won[side] &= ~(1 << tbl)
+                self.game_winner = self._meta_winner()
+            else:
+                self.drawn &= ~(1 << tbl)
+        self.ply -= 1
+        return cell
+
+    def winner(self) -> Optional[int]:
+        """Returns the side that won the game or None"""
+        return self.game_winner
+
+    def is_over(self) -> bool:
+        """Returns True if a side won or all tables are finished"""
+        return self.game_winner is not None or self.finished == FULL_TABLE
+
+    def compute_hash(self) -> int:
+        """Zobrist hash of the position computed from scratch. It covers the
+            marks of both sides, the won tables, the forced table and the
+            side to move.
+        """
+        key = ZOBRIST_FORCED[self.forced + 1]
+        if self.turn:
+            key ^= ZOBRIST_TURN
+        for side in (0, 1):
+            masks = ZOBRIST_MASKS[side]
+            for tbl in range(9):
+                key ^= masks[tbl][self.marks[side][tbl]]
+                if self.won[side] >> tbl & 1:
+                    key ^= ZOBRIST_WON[side][tbl]
+        return key
+
+    def key(self) -> Tuple:
+        """Hashable key of the position, independent of the move history"""
+        return (tuple(self.marks[0]), tuple(self.marks[1]), self.forced, self.turn)
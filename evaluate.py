@@ -0,0 +1,184 @@
+import json
+from dataclasses import asdict, dataclass, fields
+
+import numpy as np
+
+from batch import DRAW, POPCOUNT, BatchGames
+from engine import WIN_LINES, BitBoard
+
+
+@dataclass(frozen=True)
+class Weights:
+    """ Weights of the evaluation features, seen from one side. The score
+        of a position is the side to move's sum minus the opponent's sum.
+
+    game_won {int} -- score of a won game
+    table_won {int} -- per won table
+    meta_line {int} -- per line of the meta board with one won table and
+                       no table won by the opponent or drawn
+    meta_threat {int} -- per such line with two won tables
+    table_line {int} -- per line of an open table with one mark and no
+                        opponent mark
+    table_threat {int} -- per such line with two marks
+    free_choice {int} -- for the side to move if it may play in any table
+    forced_threat {int} -- for the side to move if it is sent to a table
+                           it can win with the next move
+    """
+
+    game_won: int = 100000
+    table_won: int = 100
+    meta_line: int = 20
+    meta_threat: int = 80
+    table_line: int = 1
+    table_threat: int = 4
+    free_choice: int = 10
+    forced_threat: int = 15
+
+    @classmethod
+    def from_dict(cls, config: dict) -> "Weights":
+        """Weights from a config dict, missing weights keep their default.
+
+        Raises:
+            ValueError: for an unknown weight name
+        """
+        names = {field.name for field in fields(cls)}
+        unknown = set(config) - names
+        if unknown:
+            raise ValueError(f"Unknown weights: {', '.join(sorted(unknown))}")
+        return cls(**config)
+
+    @classmethod
+    def load(cls, path: str) -> "Weights":
+        """Weights from a JSON file with a config dict"""
+        with open(path) as config_file:
+            return cls.from_dict(json.load(config_file))
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+DEFAULT_WEIGHTS = Weights()
+
+
+def _line_counts() -> np.ndarray:
+    """(2, 512 * 512) counts of the lines with exactly one and exactly two
+        marks of own and no position of blocked, indexed by
+        own << 9 | blocked.
+    """
+    own = np.arange(512)[:, None]
+    blocked = np.arange(512)[None, :]
+    counts = np.zeros((2, 512, 512), dtype=np.int32)
+    for line in WIN_LINES:
+        marks = POPCOUNT[own & line]
+        free = (blocked & line) == 0
+        counts[0] += free & (marks == 1)
+        counts[1] += free & (marks == 2)
+    return counts.reshape(2, -1)
+
+
+# LINES_ONE[own << 9 | blocked] and LINES_TWO[own << 9 | blocked], the same
+# lookups serve the tables (blocked = opponent marks) and the meta board
+# (blocked = tables won by the opponent or drawn)
+LINE_COUNTS = _line_counts()
+LINES_ONE = LINE_COUNTS[0].tolist()
+LINES_TWO = LINE_COUNTS[1].tolist()
+
+
+def evaluate_position(position, weights: Weights = DEFAULT_WEIGHTS) -> int:
+    """Static score of a position for the side to move.
+
+    Arguments:
+        position -- Board or BitBoard
+
+    Keyword Arguments:
+        weights {Weights} -- feature weights (default: {DEFAULT_WEIGHTS})
+
+    Returns:
+        int -- score, positive if the side to move stands better
+    """
+    engine = position if isinstance(position, BitBoard) else position.engine
+    turn = engine.turn
+    if engine.game_winner is not None:
+        return weights.game_won if engine.game_winner == turn else -weights.game_won
+
+    finished, drawn, won = engine.finished, engine.drawn, engine.won
+    score = 0
+    for side in (0, 1):
+        own_won = won[side]
+        meta = own_won << 9 | won[1 - side] | drawn
+        ones = two_lines = 0
+        marks, other_marks = engine.marks[side], engine.marks[1 - side]
+        for tbl in range(9):
+            if not finished >> tbl & 1:
+                index = marks[tbl] << 9 | other_marks[tbl]
+                ones += LINES_ONE[index]
+                two_lines += LINES_TWO[index]
+        side_score = (
+            weights.table_won * bin(own_won).count("1")
+            + weights.meta_line * LINES_ONE[meta]
+            + weights.meta_threat * LINES_TWO[meta]
+            + weights.table_line * ones
+            + weights.table_threat * two_lines
+        )
+        score += side_score if side == turn else -side_score
+
+    forced = engine.forced
+    if forced == -1:
+        score += weights.free_choice
+    elif LINES_TWO[engine.marks[turn][forced] << 9 | engine.marks[1 - turn][forced]]:
+        score += weights.forced_threat
+    return score
+
+
+def evaluate_batch(positions, weights: Weights = DEFAULT_WEIGHTS) -> np.ndarray:
+    """Vectorized evaluate_position over many positions at once.
+
+    Arguments:
+        positions -- BatchGames, (N, 22) uint8 array or a sequence of
+                     positions encoded by codec.encode_position
+
+    Keyword Arguments:
+        weights {Weights} -- feature weights (default: {DEFAULT_WEIGHTS})
+
+    Returns:
+        np.ndarray -- (N,) int64 score per position for the side to move
+    """
+    games = (
+        positions
+        if isinstance(positions, BatchGames)
+        else BatchGames.from_positions(positions)
+    )
+    rows = np.arange(games.n)
+    turn = games.turn.astype(np.intp)
+    marks = games.marks.astype(np.int64)
+    won = games.won.astype(np.int64)
+    open_tables = games.finished == 0
+    drawn = ((games.finished == DRAW) * (1 << np.arange(9))).sum(axis=1)
+
+    score = np.zeros(games.n, dtype=np.int64)
+    for side in (0, 1):
+        meta = won[:, side] << 9 | won[:, 1 - side] | drawn
+        index = marks[:, side] << 9 | marks[:, 1 - side]
+        side_score = (
+            weights.table_won * POPCOUNT[won[:, side]].astype(np.int64)
+            + weights.meta_line * LINE_COUNTS[0, meta]
+            + weights.meta_threat * LINE_COUNTS[1, meta]
+            + weights.table_line * (LINE_COUNTS[0, index] * open_tables).sum(axis=1)
+            + weights.table_threat * (LINE_COUNTS[1, index] * open_tables).sum(axis=1)
+        )
+        score += np.where(turn == side, side_score, -side_score)
+
+    forced = games.forced.astype(np.intp)
+    table = np.maximum(forced, 0)
+    own = marks[rows, turn, table]
+    other = marks[rows, 1 - turn, table]
+    threat = (forced >= 0) & (LINE_COUNTS[1, own << 9 | other] > 0)
+    score += np.where(forced == -1, weights.free_choice, 0)
+    score += np.where(threat, weights.forced_threat, 0)
+
+    winner = games.result - 1
+    decided = (games.result == 1) | (games.result == 2)
+    score = np.where(
+        decided, np.where(winner == turn, weights.game_won, -weights.game_won), score
+    )
+    return score
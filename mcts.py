@@ -0,0 +1,288 @@
+import math
+import random
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from engine import CELL_COORDS, BitBoard
+
+
+class SearchResult(NamedTuple):
+    """Outcome of a search
+
+    move {Tuple[int, int]} -- best move as (table number, table position)
+    visits {Dict[Tuple[int, int], int]} -- visit count per root move
+    value {float} -- mean result of the best move for the side to move
+    playouts {int} -- number of playouts of this search
+    seconds {float} -- duration of this search
+    """
+
+    move: Optional[Tuple[int, int]]
+    visits: Dict[Tuple[int, int], int]
+    value: float
+    playouts: int
+    seconds: float
+
+    @property
+    def playouts_per_sec(self) -> float:
+        return self.playouts / self.seconds if self.seconds > 0 else 0.0
+
+
+class Node:
+    """Search tree node. wins are counted for the side which played move."""
+
+    __slots__ = ("move", "parent", "children", "untried", "visits", "wins")
+
+    def __init__(self, move: int = -1, parent: "Node" = None):
+        self.move = move
+        self.parent = parent
+        self.children: List["Node"] = []
+        # legal moves without child node, None until the node is expanded
+        self.untried: Optional[List[int]] = None
+        self.visits = 0
+        self.wins = 0.0
+
+    def child(self, move: int) -> Optional["Node"]:
+        for node in self.children:
+            if node.move == move:
+                return node
+        return None
+
+
+def to_engine(position) -> BitBoard:
+    """Get an engine for a Board, a BitBoard or a (board_dict,
+        insertion_order) tuple.
+    """
+    if isinstance(position, BitBoard):
+        return position
+    if isinstance(position, tuple):
+        board_dict, insertion_order = position
+        return BitBoard.from_board_dict(board_dict, insertion_order)
+    return position.engine
+
+
+class MCTS:
+    """ Monte Carlo Tree Search with UCT selection and random playouts.
+        The search tree is kept between searches, a search from a position
+        which was reached by up to 4 moves from the previous root (according
+        to the engine's move history) continues on that subtree.
+
+        With a solver.Solver, positions it can solve are not searched: the
+        root gets the exact best move and leaves the exact result instead
+        of a random playout.
+
+    Keyword Arguments:
+        exploration {float} -- UCT exploration constant (default: {1.4})
+        seed {int} -- seed for the playouts (default: {None})
+        solver {solver.Solver} -- exact endgame solver (default: {None})
+        solver_nodes {int} -- node budget of a leaf solve, a playout is
+                              done if it is used up (default: {1000})
+    """
+
+    def __init__(
+        self,
+        exploration: float = 1.4,
+        seed: int = None,
+        solver=None,
+        solver_nodes: int = 1000,
+    ):
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.solver = solver
+        self.solver_nodes = solver_nodes
+        self.root: Optional[Node] = None
+        self.root_key = None
+
+    def search(
+        self,
+        position: Union["Board", BitBoard, Tuple[Dict, List]],
+        iterations: int = None,
+        time_limit: float = None,
+    ) -> SearchResult:
+        """Search the best move for the side to move.
+
+        Arguments:
+            position -- Board, BitBoard or (board_dict, insertion_order)
+
+        Keyword Arguments:
+            iterations {int} -- number of playouts (default: {None})
+            time_limit {float} -- seconds to search (default: {None})
+                                  1000 playouts are done if neither
+                                  iterations nor time_limit is set
+
+        Returns:
+            SearchResult -- best move and visit statistics
+        """
+        if iterations is None and time_limit is None:
+            iterations = 1000
+        engine = to_engine(position).copy()
+        if self.solver is not None and self.solver.can_solve(engine):
+            solved = self.solver.solve(engine)
+            if solved.move is not None:
+                visits = {solved.move: 1}
+                value = (solved.outcome + 1) / 2
+                return SearchResult(solved.move, visits, value, 0, solved.seconds)
+        self._set_root(engine)
+        root = self.root
+
+        start = time.perf_counter()
+        deadline = None if time_limit is None else start + time_limit
+        playouts = 0
+        while True:
+            if iterations is not None and playouts >= iterations:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            self._iterate(root, engine)
+            playouts += 1
+        seconds = time.perf_counter() - start
+
+        visits = {CELL_COORDS[node.move]: node.visits for node in root.children}
+        if not root.children:
+            return SearchResult(None, visits, 0.0, playouts, seconds)
+        best = max(root.children, key=lambda node: node.visits)
+        return SearchResult(
+            CELL_COORDS[best.move],
+            visits,
+            best.wins / best.visits if best.visits else 0.0,
+            playouts,
+            seconds,
+        )
+
+    def _set_root(self, engine: BitBoard):
+        key = engine.key()
+        if self.root is not None and key != self.root_key:
+            self.root = self._find_subtree(engine)
+        if self.root is None:
+            self.root = Node()
+        self.root.parent = None
+        self.root_key = key
+
+    def _find_subtree(self, engine: BitBoard) -> Optional[Node]:
+        """Find the node of the position below the current root by taking
+            back the moves of the engine's history.
+        """
+        previous = engine.copy()
+        moves = []
+        while previous.history and len(moves) < 4:
+            moves.append(previous.pop())
+            if previous.key() == self.root_key:
+                node = self.root
+                for move in reversed(moves):
+                    node = node.child(move)
+                    if node is None:
+                        return None
+                return node
+        return None
+
+    def _iterate(self, root: Node, engine: BitBoard):
+        ply = engine.ply
+        # side which played the move into node
+        side = 1 - engine.turn
+        node = root
+        log = math.log
+        sqrt = math.sqrt
+        c = self.exploration
+
+        # selection
+        while node.untried is not None and not node.untried and node.children:
+            log_visits = log(node.visits)
+            node = max(
+                node.children,
+                key=lambda child: child.wins / child.visits
+                + c * sqrt(log_visits / child.visits),
+            )
+            engine.push(node.move)
+            side = 1 - side
+
+        # expansion
+        if node.untried is None:
+            if engine.winner() is None:
+                node.untried = engine.legal_moves()
+                self.rng.shuffle(node.untried)
+            else:
+                node.untried = []
+        if node.untried:
+            move = node.untried.pop()
+            engine.push(move)
+            child = Node(move, node)
+            node.children.append(child)
+            node = child
+            side = 1 - side
+
+        winner = self._leaf_winner(engine)
+        while engine.ply > ply:
+            engine.pop()
+
+        # backpropagation
+        while node is not None:
+            node.visits += 1
+            if winner is None:
+                node.wins += 0.5
+            elif winner == side:
+                node.wins += 1.0
+            node = node.parent
+            side = 1 - side
+
+    def _leaf_winner(self, engine: BitBoard) -> Optional[int]:
+        """Exact winner from the solver if it can solve the position in
+            its node budget, else the winner of a random playout.
+        """
+        solver = self.solver
+        if solver is not None and engine.winner() is None and solver.can_solve(engine):
+            solved = solver.solve(engine, max_nodes=self.solver_nodes)
+            if solved is not None:
+                if solved.outcome == 0:
+                    return None
+                return engine.turn if solved.outcome > 0 else 1 - engine.turn
+        return self._playout(engine)
+
+    def _playout(self, engine: BitBoard) -> Optional[int]:
+        """Play random moves until the game ends and return the winner"""
+        winner = engine.winner()
+        choice = self.rng.choice
+        while winner is None:
+            moves = engine.legal_moves()
+            if not moves:
+                return None
+            engine.push(choice(moves))
+            if engine.history[-1][4]:
+                winner = engine.winner()
+        return winner
+
+
+class MCTSPlayer:
+    """Player callable which returns the move of a MCTS search for a Board.
+
+    Keyword Arguments:
+        iterations {int} -- playouts per move (default: {None})
+        time_limit {float} -- seconds per move (default: {None})
+        seed {int} -- seed for the playouts (default: {None})
+        book {book.OpeningBook} -- opening book which is consulted before
+                                   the search (default: {None})
+        solver {solver.Solver} -- exact endgame solver (default: {None})
+    """
+
+    def __init__(
+        self,
+        iterations: int = None,
+        time_limit: float = None,
+        seed: int = None,
+        book=None,
+        solver=None,
+    ):
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.mcts = MCTS(seed=seed, solver=solver)
+        self.book = book
+        self.last_result: Optional[SearchResult] = None
+
+    def __call__(self, board) -> Optional[Tuple[int, int]]:
+        if self.book is not None:
+            move = self.book.lookup(board)
+            if move is not None:
+                self.last_result = None
+                return move
+        self.last_result = self.mcts.search(
+            board, iterations=self.iterations, time_limit=self.time_limit
+        )
+        return self.last_result.move
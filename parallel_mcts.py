@@ -0,0 +1,144 @@
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from engine import CELL_COORDS, BitBoard
+from mcts import MCTS, SearchResult, to_engine
+
+
+def _search_worker(
+    data: bytes, iterations: Optional[int], time_limit: Optional[float], seed
+) -> Tuple[List[Tuple[int, int, float]], int]:
+    """Search an independent tree in a worker process.
+
+    Returns:
+        Tuple[List[Tuple[int, int, float]], int] -- (cell, visits, wins) per
+                                                    root move and the number
+                                                    of playouts
+    """
+    engine = BitBoard.from_bytes(data)
+    mcts = MCTS(seed=seed)
+    result = mcts.search(engine, iterations=iterations, time_limit=time_limit)
+    stats = [(node.move, node.visits, node.wins) for node in mcts.root.children]
+    return stats, result.playouts
+
+
+def parallel_search(
+    position,
+    workers: int = None,
+    iterations: int = None,
+    time_limit: float = None,
+    seed: int = None,
+    executor: Executor = None,
+) -> SearchResult:
+    """Root parallel MCTS. Every worker process searches its own tree from
+        the same root and the visit counts of the root moves are merged.
+        The root is sent to the workers as the 24 bytes of
+        BitBoard.to_bytes.
+
+    Arguments:
+        position -- Board, BitBoard or (board_dict, insertion_order)
+
+    Keyword Arguments:
+        workers {int} -- number of trees, the number of CPUs if not set
+                         (default: {None})
+        iterations {int} -- playouts per worker (default: {None})
+        time_limit {float} -- seconds per worker (default: {None})
+        seed {int} -- worker i searches with seed + i (default: {None})
+        executor {Executor} -- executor to reuse, a ProcessPoolExecutor with
+                               workers processes is created if not set
+                               (default: {None})
+
+    Returns:
+        SearchResult -- merged visit statistics, playouts of all workers
+    """
+    data = to_engine(position).to_bytes()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+    start = time.perf_counter()
+    try:
+        futures = [
+            executor.submit(
+                _search_worker,
+                data,
+                iterations,
+                time_limit,
+                None if seed is None else seed + i,
+            )
+            for i in range(workers)
+        ]
+        outcomes = [future.result() for future in futures]
+    finally:
+        if own_executor:
+            executor.shutdown()
+    seconds = time.perf_counter() - start
+
+    visits: Dict[int, int] = {}
+    wins: Dict[int, float] = {}
+    playouts = 0
+    for stats, worker_playouts in outcomes:
+        playouts += worker_playouts
+        for cell, cell_visits, cell_wins in stats:
+            visits[cell] = visits.get(cell, 0) + cell_visits
+            wins[cell] = wins.get(cell, 0.0) + cell_wins
+
+    coords_visits = {CELL_COORDS[cell]: count for cell, count in visits.items()}
+    if not visits:
+        return SearchResult(None, coords_visits, 0.0, playouts, seconds)
+    best = max(visits, key=visits.get)
+    return SearchResult(
+        CELL_COORDS[best],
+        coords_visits,
+        wins[best] / visits[best],
+        playouts,
+        seconds,
+    )
+
+
+class ParallelMCTSPlayer:
+    """Player callable which searches with root parallel MCTS. The process
+        pool is created on the first move and kept until close is called.
+
+    Keyword Arguments:
+        workers {int} -- number of worker processes (default: {None})
+        iterations {int} -- playouts per worker and move (default: {None})
+        time_limit {float} -- seconds per move (default: {None})
+        seed {int} -- seed for the workers (default: {None})
+    """
+
+    def __init__(
+        self,
+        workers: int = None,
+        iterations: int = None,
+        time_limit: float = None,
+        seed: int = None,
+    ):
+        self.workers = workers
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.seed = seed
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.last_result: Optional[SearchResult] = None
+
+    def __call__(self, board) -> Optional[Tuple[int, int]]:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.last_result = parallel_search(
+            board,
+            workers=self.workers,
+            iterations=self.iterations,
+            time_limit=self.time_limit,
+            seed=self.seed,
+            executor=self.executor,
+        )
+        return self.last_result.move
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
@@ -0,0 +1,145 @@
+import cProfile
+import functools
+import pstats
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, NamedTuple
+
+from board import Board
+
+# Board methods which are timed while instrumentation is enabled
+INSTRUMENTED = (
+    "is_legal_move",
+    "next_move",
+    "update_finished_table",
+    "player_won_game",
+    "__str__",
+)
+
+# method name -> [calls, seconds] while enabled
+_counters: Dict[str, List] = {name: [0, 0.0] for name in INSTRUMENTED}
+# method name -> undecorated method, empty while disabled
+_originals: Dict[str, Callable] = {}
+
+
+class CallStats(NamedTuple):
+    """Calls and accumulated time of one Board method
+
+    calls {int} -- number of calls
+    seconds {float} -- time spent in the method including nested
+                       instrumented calls
+    """
+
+    calls: int
+    seconds: float
+
+    @property
+    def mean(self) -> float:
+        return self.seconds / self.calls if self.calls else 0.0
+
+
+def _timed(method: Callable, counter: List) -> Callable:
+    perf_counter = time.perf_counter
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            counter[0] += 1
+            counter[1] += perf_counter() - start
+
+    return wrapper
+
+
+def enable():
+    """Replace the INSTRUMENTED methods of Board by timed wrappers. While
+        disabled Board keeps its plain methods, so the instrumentation
+        costs nothing.
+    """
+    if _originals:
+        return
+    for name in INSTRUMENTED:
+        method = Board.__dict__[name]
+        _originals[name] = method
+        setattr(Board, name, _timed(method, _counters[name]))
+
+
+def disable():
+    """Restore the plain Board methods, the counters are kept"""
+    for name, method in _originals.items():
+        setattr(Board, name, method)
+    _originals.clear()
+
+
+def is_enabled() -> bool:
+    return bool(_originals)
+
+
+def reset():
+    """Set all counters to zero"""
+    for counter in _counters.values():
+        counter[0], counter[1] = 0, 0.0
+
+
+def snapshot() -> Dict[str, CallStats]:
+    """Copy of the counters.
+
+    Returns:
+        Dict[str, CallStats] -- calls and time per method name
+    """
+    return {name: CallStats(*counter) for name, counter in _counters.items()}
+
+
+@contextmanager
+def instrumented(clear: bool = True) -> Iterator[Dict[str, CallStats]]:
+    """Enable the instrumentation inside a with block. The yielded dict is
+        filled with the snapshot when the block ends.
+
+    Keyword Arguments:
+        clear {bool} -- reset the counters first (default: {True})
+
+    Example:
+        with instrumented() as stats:
+            board.next_move(1, 5, "X")
+        print(stats["is_legal_move"].calls)
+    """
+    was_enabled = is_enabled()
+    if clear:
+        reset()
+    enable()
+    stats: Dict[str, CallStats] = {}
+    try:
+        yield stats
+    finally:
+        if not was_enabled:
+            disable()
+        stats.update(snapshot())
+
+
+@contextmanager
+def profile(path: str = None, sort: str = "cumulative", limit: int = 0):
+    """Run a with block under cProfile.
+
+    Keyword Arguments:
+        path {str} -- dump the profile to this file for pstats or other
+                      viewers (default: {None})
+        sort {str} -- sort key of the printed statistics (default:
+                      {"cumulative"})
+        limit {int} -- print this many entries of the statistics, nothing
+                       if 0 (default: {0})
+
+    Returns:
+        cProfile.Profile -- profiler, stopped when the block ends
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path is not None:
+            profiler.dump_stats(path)
+        if limit:
+            pstats.Stats(profiler).sort_stats(sort).print_stats(limit)
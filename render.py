@@ -0,0 +1,119 @@
+from typing import List, Tuple
+
+
+# The grid of Board.__str__ as fixed text parts with one slot part per cell:
+# SLOTS[tbl][pos] is the index of the part of cell (tbl, pos), counted
+# from 0. Rendering only replaces slot parts and joins the parts.
+def _template() -> Tuple[List[str], Tuple[Tuple[int, ...], ...]]:
+    parts: List[str] = []
+    slots = [[0] * 9 for _ in range(9)]
+    border = "+" + "---+" * 8 + "---+" + "\n"
+    parts.append(border)
+    for band in range(3):
+        for row in range(3):
+            if row:
+                parts.append("|" + "   +" * 8 + "   |" + "\n")
+            for col in range(3):
+                tbl = band * 3 + col
+                for k in range(3):
+                    parts.append("   " if k else "| ")
+                    slots[tbl][row * 3 + k] = len(parts)
+                    parts.append(" ")
+                parts.append(" ")
+            parts.append("|\n")
+        parts.append(border)
+    parts.append("-" * 37 + "\n")
+    return parts, tuple(tuple(table) for table in slots)
+
+
+TEMPLATE, SLOTS = _template()
+
+# ANSI escape codes of the compact mode
+ANSI_COLORS = ("\033[31m", "\033[34m")
+ANSI_DEFAULT_COLOR = "\033[39m"
+ANSI_BOLD = "\033[1m"
+ANSI_RESET = "\033[0m"
+
+
+class RenderCache:
+    """ Rendered text of a board and the engine marks it was rendered from.
+        Tables whose marks did not change are not patched again.
+    """
+
+    __slots__ = ("marks", "parts", "text")
+
+    def __init__(self):
+        self.marks = None
+        self.parts = list(TEMPLATE)
+        self.text = ""
+
+
+def render(board) -> str:
+    """Text of Board.__str__. The text is cached on the board and only the
+        tables whose marks changed since the last call are patched, so
+        repeated calls without a move return the cached string.
+
+    Arguments:
+        board {Board} -- board to render, its state has to be changed
+                         through its methods (push, pop, next_move)
+
+    Returns:
+        str -- board grid
+    """
+    cache = board._render_cache
+    marks = board.engine.marks
+    if cache is None:
+        cache = board._render_cache = RenderCache()
+        changed = range(9)
+    else:
+        old_a, old_b = cache.marks
+        marks_a, marks_b = marks
+        changed = [
+            tbl
+            for tbl in range(9)
+            if marks_a[tbl] != old_a[tbl] or marks_b[tbl] != old_b[tbl]
+        ]
+        if not changed:
+            return cache.text
+
+    parts, state = cache.parts, board.state
+    for tbl in changed:
+        table, slots = state[tbl + 1], SLOTS[tbl]
+        for pos in range(9):
+            value = table[pos + 1]
+            parts[slots[pos]] = " " if value == 0 else str(value)
+    cache.marks = (tuple(marks[0]), tuple(marks[1]))
+    cache.text = "".join(parts)
+    return cache.text
+
+
+def render_compact(board, ansi: bool = False) -> str:
+    """Single line for log streams: the 9 tables with 9 cells each,
+        separated by "|", an empty cell is ".".
+
+    Arguments:
+        board {Board} -- board to render
+
+    Keyword Arguments:
+        ansi {bool} -- color the players' marks and print won tables in
+                       bold (default: {False})
+
+    Returns:
+        str -- one line without line break
+    """
+    labels = (board.playerA, board.playerB)
+    tables = []
+    for tbl_no in range(1, 10):
+        table = board.state[tbl_no]
+        cells = ["." if table[pos] == 0 else str(table[pos]) for pos in range(1, 10)]
+        if ansi:
+            cells = [
+                f"{ANSI_COLORS[labels.index(cell)]}{cell}{ANSI_DEFAULT_COLOR}"
+                if cell in labels
+                else cell
+                for cell in cells
+            ]
+            if board.finished_tables[tbl_no] in labels:
+                cells = [ANSI_BOLD] + cells + [ANSI_RESET]
+        tables.append("".join(cells))
+    return "|".join(tables)
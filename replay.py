@@ -0,0 +1,111 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+from engine import BitBoard
+
+
+class ReplayResult(NamedTuple):
+    """Result of a replayed game
+
+    winner {int} -- side which won (0 for the side which moved first),
+                    None if nobody won
+    length {int} -- number of legal moves
+    illegal_ply {int} -- index of the first illegal move, None if all
+                         moves were legal
+    finished {bool} -- True if the game is over after the legal moves
+    """
+
+    winner: Optional[int]
+    length: int
+    illegal_ply: Optional[int]
+    finished: bool
+
+
+def replay_game(moves: Sequence) -> ReplayResult:
+    """Validate the moves of one game without any output.
+
+    Arguments:
+        moves {Sequence} -- cell indices (e.g. a game of codec.encode_game)
+                            or [tbl_no, pos_no, ...] entries like
+                            Board.insertion_order
+
+    Returns:
+        ReplayResult -- result of the game, replay stops at the first
+                        illegal move or a move after the end of the game
+    """
+    engine = BitBoard()
+    for ply, move in enumerate(moves):
+        if isinstance(move, int):
+            cell = move
+        else:
+            tbl_no, pos_no = move[0], move[1]
+            if tbl_no not in range(1, 10) or pos_no not in range(1, 10):
+                return ReplayResult(engine.game_winner, ply, ply, engine.is_over())
+            cell = (tbl_no - 1) * 9 + pos_no - 1
+        if (
+            not 0 <= cell < 81
+            or engine.game_winner is not None
+            or not engine.is_legal(cell)
+        ):
+            return ReplayResult(engine.game_winner, ply, ply, engine.is_over())
+        engine.push(cell)
+    return ReplayResult(engine.game_winner, engine.ply, None, engine.is_over())
+
+
+def _encode(moves: Sequence) -> bytes:
+    """One byte per move for the workers, invalid moves become 255"""
+    if isinstance(moves, (bytes, bytearray, memoryview)):
+        return bytes(moves)
+    cells = bytearray()
+    for move in moves:
+        if isinstance(move, int):
+            cells.append(move if 0 <= move < 81 else 255)
+        elif move[0] in range(1, 10) and move[1] in range(1, 10):
+            cells.append((move[0] - 1) * 9 + move[1] - 1)
+        else:
+            cells.append(255)
+    return bytes(cells)
+
+
+def _replay_chunk(games: List[bytes]) -> List[ReplayResult]:
+    return [replay_game(game) for game in games]
+
+
+def replay_games(
+    games: Iterable[Sequence], workers: int = None, chunksize: int = 512
+) -> Iterator[ReplayResult]:
+    """Lazily replay many games and yield one result per game in input
+        order. Only a bounded number of games is held in memory, whatever
+        the length of the input.
+
+    Arguments:
+        games {Iterable[Sequence]} -- move sequences, see replay_game
+
+    Keyword Arguments:
+        workers {int} -- shard the games over this many processes, replay
+                         in this process if not set (default: {None})
+        chunksize {int} -- games per shard sent to a worker (default: {512})
+
+    Returns:
+        Iterator[ReplayResult] -- result per game
+    """
+    if not workers:
+        for game in games:
+            yield replay_game(game)
+        return
+
+    games = iter(games)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        while True:
+            # keep two chunks per worker in flight
+            while len(pending) < 2 * workers:
+                chunk = [_encode(game) for game in islice(games, chunksize)]
+                if not chunk:
+                    break
+                pending.append(executor.submit(_replay_chunk, chunk))
+            if not pending:
+                return
+            yield from pending.popleft().result()
@@ -0,0 +1,351 @@
+import os
+import random
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+from board import Board
+from codec import POSITION_SIZE, SAMPLES, RecordReader, RecordWriter, encode_position
+from engine import cell_index
+
+# A sample record holds the encoded position (codec.encode_position), the
+# result for the side to move as int8 (1 win, 0 draw, -1 loss) and the
+# visit count of every searched move as (cell index uint8, visits uint16).
+_RESULT = struct.Struct("<b")
+_VISIT = struct.Struct("<BH")
+
+
+class Sample(NamedTuple):
+    """Training sample of one position
+
+    position {bytes} -- position encoded by codec.encode_position
+    result {int} -- final result for the side to move: 1 win, 0 draw,
+                    -1 loss
+    visits {Dict[int, int]} -- visits per cell index of the moves the bot
+                               considered, the chosen move only for bots
+                               without visit statistics
+    """
+
+    position: bytes
+    result: int
+    visits: Dict[int, int]
+
+
+class ShardStats(NamedTuple):
+    """Outcome of one shard
+
+    shard {int} -- shard number
+    games {int} -- played games
+    positions {int} -- written samples
+    wins {Dict[str, int]} -- won games per seat, "bot0" and "bot1" for
+                             the bots in the order of the bot specs, draws
+                             under "draw"
+    seconds {float} -- time of the shard
+    """
+
+    shard: int
+    games: int
+    positions: int
+    wins: Dict[str, int]
+    seconds: float
+
+
+class RandomPlayer:
+    """ Player callable which plays uniformly random legal moves.
+
+    Keyword Arguments:
+        seed {int} -- seed of the moves (default: {None})
+    """
+
+    def __init__(self, seed: int = None):
+        self.rng = random.Random(seed)
+        self.last_result = None
+
+    def __call__(self, board: Board):
+        return self.rng.choice(board.legal_moves())
+
+
+def make_bot(spec: str, seed: int = None, time_limit: float = None) -> Callable:
+    """Player callable of a bot spec: "random", "mcts[:iterations]" or
+        "alphabeta[:depth]".
+
+    Arguments:
+        spec {str} -- bot spec
+
+    Keyword Arguments:
+        seed {int} -- seed of the bot (default: {None})
+        time_limit {float} -- seconds per move of the searching bots
+                              (default: {None})
+
+    Raises:
+        ValueError: for an unknown bot
+    """
+    name, _, arg = spec.partition(":")
+    if name == "random":
+        return RandomPlayer(seed)
+    if name == "mcts":
+        from mcts import MCTSPlayer
+
+        iterations = int(arg) if arg else None
+        return MCTSPlayer(iterations=iterations, time_limit=time_limit, seed=seed)
+    if name == "alphabeta":
+        from alphabeta import AlphaBetaPlayer
+
+        depth = int(arg) if arg else None
+        return AlphaBetaPlayer(max_depth=depth, time_limit=time_limit)
+    raise ValueError(f"Unknown bot {spec}.")
+
+
+def _visits(player: Callable, board: Board, move) -> Dict[int, int]:
+    result = player.last_result
+    visits = getattr(result, "visits", None)
+    if visits:
+        return {cell_index(*coords): count for coords, count in visits.items()}
+    if isinstance(player, RandomPlayer):
+        return {cell_index(*coords): 1 for coords in board.legal_moves()}
+    return {cell_index(*move): 1}
+
+
+def encode_sample(position: bytes, result: int, visits: Dict[int, int]) -> bytes:
+    return (
+        position
+        + _RESULT.pack(result)
+        + b"".join(
+            _VISIT.pack(cell, min(count, 0xFFFF))
+            for cell, count in sorted(visits.items())
+        )
+    )
+
+
+def decode_sample(record: bytes) -> Sample:
+    position = record[:POSITION_SIZE]
+    (result,) = _RESULT.unpack_from(record, POSITION_SIZE)
+    visits = dict(_VISIT.iter_unpack(record[POSITION_SIZE + _RESULT.size :]))
+    return Sample(position, result, visits)
+
+
+def play_game(bots: Sequence[Callable]) -> tuple:
+    """Play one game between two bots on a Board, bots[0] moves first.
+
+    Returns:
+        tuple -- (winner index into bots or None for a draw, list of
+                 (encoded position, side to move, visits) per move)
+    """
+    board = Board()
+    moves = []
+    side = 0
+    while board.get_winner() is None:
+        if not board.legal_moves():
+            return None, moves
+        position = encode_position(board)
+        move = bots[side](board)
+        moves.append((position, side, _visits(bots[side], board, move)))
+        board.push(*move)
+        side = 1 - side
+    return (0 if board.get_winner() == board.playerA else 1), moves
+
+
+def _seat(index: int) -> str:
+    # wins are counted per seat, the bot specs of a mirror match are equal
+    return f"bot{index}"
+
+
+def _no_wins() -> Dict[str, int]:
+    return {_seat(0): 0, _seat(1): 0, "draw": 0}
+
+
+def shard_path(out_dir: str, shard: int) -> str:
+    return os.path.join(out_dir, f"shard-{shard:05d}.uttt")
+
+
+def play_shard(
+    out_dir: str, shard: int, games: int, bots: Sequence[str], seed: int
+) -> ShardStats:
+    """Play the games of a shard and stream the samples to its file. The
+        file gets its final name when the shard is complete, an interrupted
+        shard is played again from the start with the same seeds.
+
+    Arguments:
+        out_dir {str} -- output directory
+        shard {int} -- shard number
+        games {int} -- games of the shard
+        bots {Sequence[str]} -- two bot specs, they change sides every game
+        seed {int} -- base seed, the bots of the shard are seeded from seed
+                      and shard
+
+    Returns:
+        ShardStats -- games, samples and wins of the shard
+    """
+    start = time.perf_counter()
+    rng = random.Random(seed * 1000003 + shard)
+    wins = _no_wins()
+    positions = 0
+    path = shard_path(out_dir, shard)
+    with RecordWriter(path + ".part", SAMPLES) as writer:
+        for game in range(games):
+            order = (0, 1) if game % 2 == 0 else (1, 0)
+            players = [make_bot(bots[i], rng.randrange(2 ** 32)) for i in order]
+            winner, moves = play_game(players)
+            if winner is None:
+                wins["draw"] += 1
+            else:
+                wins[_seat(order[winner])] += 1
+            for position, side, visits in moves:
+                result = 0 if winner is None else (1 if winner == side else -1)
+                writer.write(encode_sample(position, result, visits))
+            positions += len(moves)
+    os.replace(path + ".part", path)
+    return ShardStats(shard, games, positions, wins, time.perf_counter() - start)
+
+
+class SelfPlayReport(NamedTuple):
+    """Summary of a self-play run
+
+    games {int} -- games played in this run
+    positions {int} -- samples written in this run
+    skipped_shards {int} -- shards which were complete before the run
+    wins {Dict[str, int]} -- won games per seat, see ShardStats
+    seconds {float} -- wall time
+    """
+
+    games: int
+    positions: int
+    skipped_shards: int
+    wins: Dict[str, int]
+    seconds: float
+
+    @property
+    def games_per_hour(self) -> float:
+        return self.games / self.seconds * 3600 if self.seconds else 0.0
+
+
+def run_selfplay(
+    out_dir: str,
+    games: int,
+    bots: Sequence[str] = ("mcts:200", "mcts:200"),
+    shard_size: int = 100,
+    workers: int = None,
+    seed: int = 0,
+    progress: Optional[Callable[[ShardStats], None]] = None,
+) -> SelfPlayReport:
+    """Play self-play games across a process pool into sharded files.
+        Complete shards of an earlier run with the same settings are
+        skipped, so an interrupted run is resumed by starting it again.
+
+    Arguments:
+        out_dir {str} -- output directory
+        games {int} -- total number of games
+
+    Keyword Arguments:
+        bots {Sequence[str]} -- two bot specs, see make_bot
+                                (default: {("mcts:200", "mcts:200")})
+        shard_size {int} -- games per shard file (default: {100})
+        workers {int} -- worker processes, the shards are played in this
+                         process if 0 (default: {None})
+        seed {int} -- base seed (default: {0})
+        progress {Callable} -- called with the ShardStats of every finished
+                               shard (default: {None})
+
+    Returns:
+        SelfPlayReport -- games, samples, wins and games per hour
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    shards = [
+        (shard, min(shard_size, games - shard * shard_size))
+        for shard in range(-(-games // shard_size))
+    ]
+    pending = [
+        (shard, count)
+        for shard, count in shards
+        if not os.path.exists(shard_path(out_dir, shard))
+    ]
+    wins = _no_wins()
+    played = positions = 0
+    start = time.perf_counter()
+
+    def collect(stats: ShardStats):
+        nonlocal played, positions
+        played += stats.games
+        positions += stats.positions
+        for key, count in stats.wins.items():
+            wins[key] += count
+        if progress is not None:
+            progress(stats)
+
+    if workers == 0:
+        for shard, count in pending:
+            collect(play_shard(out_dir, shard, count, bots, seed))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(play_shard, out_dir, shard, count, bots, seed)
+                for shard, count in pending
+            ]
+            for future in as_completed(futures):
+                collect(future.result())
+    return SelfPlayReport(
+        played,
+        positions,
+        len(shards) - len(pending),
+        wins,
+        time.perf_counter() - start,
+    )
+
+
+def read_samples(out_dir: str) -> Iterator[Sample]:
+    """Samples of all complete shards of a directory in shard order"""
+    names = sorted(
+        name
+        for name in os.listdir(out_dir)
+        if name.startswith("shard-") and name.endswith(".uttt")
+    )
+    for name in names:
+        with RecordReader(os.path.join(out_dir, name)) as reader:
+            for record in reader:
+                yield decode_sample(record)
+
+
+def main(argv: List[str] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Self-play data generation")
+    parser.add_argument("out_dir", help="directory of the shard files")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument(
+        "--bots", nargs=2, default=["mcts:200", "mcts:200"], metavar="BOT"
+    )
+    parser.add_argument("--shard-size", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    done = 0
+
+    def progress(stats: ShardStats):
+        nonlocal done
+        done += stats.games
+        rate = done / (time.perf_counter() - start) * 3600
+        print(f"shard {stats.shard}: {stats.games} games, {rate:.0f} games/hour")
+
+    report = run_selfplay(
+        args.out_dir,
+        args.games,
+        args.bots,
+        args.shard_size,
+        args.workers,
+        args.seed,
+        progress,
+    )
+    print(
+        f"{report.games} games, {report.positions} positions, "
+        f"{report.skipped_shards} shards resumed, "
+        f"{report.games_per_hour:.0f} games/hour, wins {report.wins} "
+        f"(bot0 {args.bots[0]}, bot1 {args.bots[1]})"
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,328 @@
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Set
+
+from board import Board, IllegalMoveError
+
+# Protocol: every request and response is one JSON object per line.
+#
+#   {"op": "new"}                        -> {"ok": true, "game": id, ...state}
+#   {"op": "move", "game": id, "tbl": t, "pos": p[, "player": label]}
+#                                        -> {"ok": true, ...state}
+#   {"op": "state", "game": id}          -> {"ok": true, ...state}
+#   {"op": "close", "game": id}          -> {"ok": true}
+#   {"op": "metrics"[, "game": id]}      -> {"ok": true, ...latency metrics}
+#
+# The state holds the player to move ("next"), the legal moves as
+# [tbl, pos] lists, the winner's label and whether the game is over. Errors
+# are answered with {"ok": false, "error": message}. A game can only be
+# used by the connection which created it and is removed when that
+# connection is closed.
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile, q in 0 .. 100, 0.0 for no values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+class Game:
+    """ A hosted game and the latency of its moves.
+
+    Arguments:
+        board {Board} -- board of the game
+    """
+
+    __slots__ = ("board", "moves", "seconds", "max_seconds")
+
+    def __init__(self, board: Board):
+        self.board = board
+        self.moves = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    def state(self) -> dict:
+        board = self.board
+        winner = board.get_winner()
+        legal = [] if winner is not None else board.legal_moves()
+        return {
+            "next": board.playerB if board.engine.turn else board.playerA,
+            "legal": [list(move) for move in legal],
+            "winner": winner,
+            "over": winner is not None or not legal,
+        }
+
+    def metrics(self) -> dict:
+        return {
+            "moves": self.moves,
+            "mean_ms": self.seconds / self.moves * 1e3 if self.moves else 0.0,
+            "max_ms": self.max_seconds * 1e3,
+        }
+
+
+class GameServer:
+    """ Asyncio TCP server which hosts many games at the same time. Moves
+        are validated by Board.push, so a win is reported to the clients
+        instead of printed.
+
+    Keyword Arguments:
+        max_samples {int} -- latest move latencies kept for the server
+                             percentiles (default: {100000})
+
+    Example:
+        server = GameServer()
+        await server.start("127.0.0.1", 8765)
+        await server.serve_forever()
+    """
+
+    def __init__(self, max_samples: int = 100000):
+        self.games: Dict[int, Game] = {}
+        self.latencies = deque(maxlen=max_samples)
+        self.total_moves = 0
+        self.server: Optional[asyncio.AbstractServer] = None
+        self._next_id = 0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start listening and return the port, port 0 picks a free one"""
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer):
+        owned: Set[int] = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = self.dispatch(json.loads(line), owned)
+                except (ValueError, TypeError, KeyError) as error:
+                    response = {"ok": False, "error": f"Bad request: {error}"}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for game_id in owned:
+                self.games.pop(game_id, None)
+            writer.close()
+
+    def dispatch(self, request: dict, owned: Set[int]) -> dict:
+        """Answer one request.
+
+        Arguments:
+            request {dict} -- decoded request
+            owned {Set[int]} -- ids of the games of the connection
+
+        Returns:
+            dict -- response
+        """
+        op = request["op"]
+        if op == "new":
+            labels = request.get("playerA", "X"), request.get("playerB", "O")
+            if labels[0] == labels[1]:
+                return {"ok": False, "error": "The players need distinct labels."}
+            self._next_id += 1
+            game = Game(Board(*labels))
+            self.games[self._next_id] = game
+            owned.add(self._next_id)
+            return {"ok": True, "game": self._next_id, **game.state()}
+        if op == "metrics" and "game" not in request:
+            return {"ok": True, **self.metrics()}
+
+        # games of other connections are unknown to this one
+        game = self.games.get(request["game"]) if request["game"] in owned else None
+        if game is None:
+            return {"ok": False, "error": f"Unknown game {request['game']}."}
+        if op == "move":
+            return self._move(game, request)
+        if op == "state":
+            return {"ok": True, **game.state()}
+        if op == "metrics":
+            return {"ok": True, **game.metrics()}
+        if op == "close":
+            del self.games[request["game"]]
+            owned.discard(request["game"])
+            return {"ok": True}
+        return {"ok": False, "error": f"Unknown op {op}."}
+
+    def _move(self, game: Game, request: dict) -> dict:
+        start = time.perf_counter()
+        board = game.board
+        player = board.playerB if board.engine.turn else board.playerA
+        if board.get_winner() is not None:
+            response = {"ok": False, "error": "The game is over."}
+        elif request.get("player", player) != player:
+            response = {"ok": False, "error": f"Player {player} has to move."}
+        else:
+            try:
+                board.push(int(request["tbl"]), int(request["pos"]))
+                response = {"ok": True, **game.state()}
+            except IllegalMoveError as error:
+                response = {"ok": False, "error": str(error)}
+        seconds = time.perf_counter() - start
+        game.moves += 1
+        game.seconds += seconds
+        game.max_seconds = max(game.max_seconds, seconds)
+        self.latencies.append(seconds)
+        self.total_moves += 1
+        return response
+
+    def metrics(self) -> dict:
+        """Move latency of the latest moves over all games"""
+        latencies = list(self.latencies)
+        return {
+            "games": len(self.games),
+            "moves": self.total_moves,
+            "p50_ms": percentile(latencies, 50) * 1e3,
+            "p99_ms": percentile(latencies, 99) * 1e3,
+        }
+
+
+class GameClient:
+    """ Client of a GameServer connection, requests are answered in order.
+
+    Example:
+        client = await GameClient.connect("127.0.0.1", 8765)
+        game = await client.request({"op": "new"})
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host: str, port: int) -> "GameClient":
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, request: dict) -> dict:
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def _play_games(
+    host: str, port: int, games: int, rng: random.Random, latencies: List[float]
+):
+    """Play games random games on one connection, one move per game in turn"""
+    client = await GameClient.connect(host, port)
+    try:
+        states = [await client.request({"op": "new"}) for _ in range(games)]
+        while states:
+            running = []
+            for state in states:
+                tbl_no, pos_no = rng.choice(state["legal"])
+                request = {
+                    "op": "move",
+                    "game": state["game"],
+                    "tbl": tbl_no,
+                    "pos": pos_no,
+                }
+                start = time.perf_counter()
+                response = await client.request(request)
+                latencies.append(time.perf_counter() - start)
+                if not response["ok"]:
+                    raise RuntimeError(response["error"])
+                if not response["over"]:
+                    response["game"] = state["game"]
+                    running.append(response)
+            states = running
+    finally:
+        await client.close()
+
+
+async def load_test(
+    host: str, port: int, games: int = 1000, connections: int = 100, seed: int = 0
+) -> dict:
+    """Play random games concurrently against a server and measure the
+        round trip latency of the moves.
+
+    Arguments:
+        host {str} -- server host
+        port {int} -- server port
+
+    Keyword Arguments:
+        games {int} -- games which are played at the same time
+                       (default: {1000})
+        connections {int} -- the games are spread over this many
+                             connections (default: {100})
+        seed {int} -- seed of the random moves (default: {0})
+
+    Returns:
+        dict -- games, moves, moves per second and p50 / p99 latency in ms
+    """
+    connections = max(1, min(connections, games))
+    latencies: List[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            _play_games(
+                host,
+                port,
+                games // connections + (i < games % connections),
+                random.Random(seed + i),
+                latencies,
+            )
+            for i in range(connections)
+        )
+    )
+    seconds = time.perf_counter() - start
+    return {
+        "games": games,
+        "connections": connections,
+        "moves": len(latencies),
+        "moves_per_sec": len(latencies) / seconds,
+        "p50_ms": percentile(latencies, 50) * 1e3,
+        "p99_ms": percentile(latencies, 99) * 1e3,
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ultimate Tic-Tac-Toe server")
+    parser.add_argument("mode", choices=["serve", "load"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--games", type=int, default=1000, help="load test games")
+    parser.add_argument(
+        "--connections", type=int, default=100, help="load test connections"
+    )
+    args = parser.parse_args(argv)
+
+    async def serve():
+        server = GameServer()
+        port = await server.start(args.host, args.port)
+        print(f"Serving on {args.host}:{port}")
+        await server.serve_forever()
+
+    if args.mode == "serve":
+        asyncio.run(serve())
+    else:
+        report = asyncio.run(
+            load_test(args.host, args.port, args.games, args.connections)
+        )
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,215 @@
+import os
+import struct
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+from engine import CELL_COORDS, WIN_TABLE, BitBoard
+from symmetry import CELL_PERMS, INVERSE, canonicalize
+
+# outcomes for the side to move
+WIN, DRAW, LOSS = 1, 0, -1
+
+# A solved positions file starts with MAGIC and a version byte, followed by
+# one record per position: canonical hash as little endian uint64, outcome
+# as int8 and the best move of the canonical position as cell index or
+# NO_MOVE.
+MAGIC = b"UTTS"
+VERSION = 1
+NO_MOVE = 255
+_HEADER = struct.Struct("<4sB")
+_RECORD = struct.Struct("<QbB")
+
+
+class SolverError(Exception):
+    """Raised when a file holds no solved positions"""
+
+    pass
+
+
+class NodeLimit(Exception):
+    """Raised inside the solver when the node budget is used up"""
+
+    pass
+
+
+class SolveResult(NamedTuple):
+    """Exact result of a position
+
+    outcome {int} -- WIN, DRAW or LOSS for the side to move
+    move {Tuple[int, int]} -- (table number, table position) of a best
+                              move, None if the game is over
+    nodes {int} -- positions visited by the solver
+    seconds {float} -- time of the solve
+    """
+
+    outcome: int
+    move: Optional[Tuple[int, int]]
+    nodes: int
+    seconds: float
+
+
+def empty_cells(engine: BitBoard) -> int:
+    """Number of empty cells in the tables which are not finished"""
+    count = 0
+    for tbl in range(9):
+        if not engine.finished >> tbl & 1:
+            occupied = engine.marks[0][tbl] | engine.marks[1][tbl]
+            count += 9 - bin(occupied).count("1")
+    return count
+
+
+class Solver:
+    """ Exact negamax solver for positions near the end of the game.
+        Results are memoized in a bounded LRU cache keyed by the canonical
+        hash (see symmetry.canonicalize), so the 8 symmetric positions
+        share one entry. With a path the solved positions are loaded from
+        and saved to a file to reuse them across processes.
+
+    Keyword Arguments:
+        max_empty {int} -- can_solve accepts positions with at most this
+                           many empty cells in open tables (default: {10})
+        max_open_tables {int} -- ... or at most this many open tables
+                                 (default: {1})
+        cache_size {int} -- entries of the LRU cache (default: {1000000})
+        path {str} -- file of solved positions (default: {None})
+    """
+
+    def __init__(
+        self,
+        max_empty: int = 10,
+        max_open_tables: int = 1,
+        cache_size: int = 1000000,
+        path: str = None,
+    ):
+        self.max_empty = max_empty
+        self.max_open_tables = max_open_tables
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[int, Tuple[int, int]]" = OrderedDict()
+        self.path = path
+        self.nodes = 0
+        self.max_nodes: Optional[int] = None
+        self.hits = 0
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def can_solve(self, position) -> bool:
+        """True if the position is small enough for the solver"""
+        engine = position if isinstance(position, BitBoard) else position.engine
+        open_tables = 9 - bin(engine.finished).count("1")
+        return (
+            open_tables <= self.max_open_tables
+            or empty_cells(engine) <= self.max_empty
+        )
+
+    def solve(self, position, max_nodes: int = None) -> Optional[SolveResult]:
+        """Solve a position exactly.
+
+        Arguments:
+            position -- Board or BitBoard
+
+        Keyword Arguments:
+            max_nodes {int} -- give up after visiting this many positions,
+                               positions solved so far stay cached
+                               (default: {None})
+
+        Returns:
+            SolveResult -- outcome and best move, None if max_nodes was
+                           reached
+        """
+        engine = position if isinstance(position, BitBoard) else position.engine
+        engine = engine.copy()
+        self.nodes = 0
+        self.max_nodes = max_nodes
+        start = time.perf_counter()
+        try:
+            outcome, cell = self._solve(engine)
+        except NodeLimit:
+            return None
+        move = None if cell == NO_MOVE else CELL_COORDS[cell]
+        return SolveResult(outcome, move, self.nodes, time.perf_counter() - start)
+
+    def _lookup(self, key: int) -> Optional[Tuple[int, int]]:
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def _store(self, key: int, outcome: int, cell: int):
+        self.cache[key] = (outcome, cell)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _solve(self, engine: BitBoard) -> Tuple[int, int]:
+        """Outcome for the side to move and a best cell index"""
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise NodeLimit()
+        if engine.game_winner is not None:
+            # the side which played the last move won
+            return LOSS, NO_MOVE
+        moves = engine.legal_moves()
+        if not moves:
+            return DRAW, NO_MOVE
+
+        canonical, t = canonicalize(engine)
+        entry = self._lookup(canonical.hash)
+        if entry is not None:
+            outcome, cell = entry
+            return outcome, cell if cell == NO_MOVE else CELL_PERMS[INVERSE[t]][cell]
+
+        best, best_cell = LOSS - 1, NO_MOVE
+        for cell in self._ordered(engine, moves):
+            engine.push(cell)
+            outcome = -self._solve(engine)[0]
+            engine.pop()
+            if outcome > best:
+                best, best_cell = outcome, cell
+                if best == WIN:
+                    break
+        self._store(canonical.hash, best, CELL_PERMS[t][best_cell])
+        return best, best_cell
+
+    @staticmethod
+    def _ordered(engine: BitBoard, moves):
+        """Moves which win a table first, they end the game soonest"""
+        marks = engine.marks[engine.turn]
+        winning, rest = [], []
+        for cell in moves:
+            if WIN_TABLE[marks[cell // 9] | 1 << cell % 9]:
+                winning.append(cell)
+            else:
+                rest.append(cell)
+        return winning + rest
+
+    def save(self, path: str = None):
+        """Write all cached positions to path or the solver's path"""
+        path = path or self.path
+        with open(path, "wb") as solved_file:
+            solved_file.write(_HEADER.pack(MAGIC, VERSION))
+            for key, (outcome, cell) in self.cache.items():
+                solved_file.write(_RECORD.pack(key, outcome, cell))
+
+    def load(self, path: str) -> int:
+        """Add the positions of a file to the cache.
+
+        Raises:
+            SolverError: if the file holds no solved positions
+
+        Returns:
+            int -- number of loaded positions
+        """
+        with open(path, "rb") as solved_file:
+            data = solved_file.read()
+        if (
+            len(data) < _HEADER.size
+            or _HEADER.unpack_from(data, 0) != (MAGIC, VERSION)
+            or (len(data) - _HEADER.size) % _RECORD.size
+        ):
+            raise SolverError(f"{path} holds no solved positions.")
+        count = 0
+        for key, outcome, cell in _RECORD.iter_unpack(data[_HEADER.size :]):
+            self._store(key, outcome, cell)
+            count += 1
+        return count
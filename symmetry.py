@@ -0,0 +1,127 @@
+from typing import Tuple
+
+from engine import BIT_INDICES, BitBoard
+
+
+def _position_perm(transform) -> Tuple[int, ...]:
+    perm = []
+    for pos in range(9):
+        row, col = divmod(pos, 3)
+        new_row, new_col = transform(row, col)
+        perm.append(new_row * 3 + new_col)
+    return tuple(perm)
+
+
+# The 8 symmetries of the 3x3 grid as permutations of the positions 0 .. 8:
+# POSITION_PERMS[t][pos] is the position pos is moved to by transform t.
+# The same permutation is applied to the table layout and to the positions
+# inside every table.
+POSITION_PERMS = tuple(
+    _position_perm(transform)
+    for transform in [
+        lambda r, c: (r, c),  # identity
+        lambda r, c: (c, 2 - r),  # rotate 90 degrees clockwise
+        lambda r, c: (2 - r, 2 - c),  # rotate 180 degrees
+        lambda r, c: (2 - c, r),  # rotate 270 degrees clockwise
+        lambda r, c: (r, 2 - c),  # mirror left / right
+        lambda r, c: (2 - r, c),  # mirror top / bottom
+        lambda r, c: (c, r),  # mirror at the main diagonal
+        lambda r, c: (2 - c, 2 - r),  # mirror at the anti diagonal
+    ]
+)
+
+# CELL_PERMS[t][cell] is the cell index cell is moved to by transform t
+CELL_PERMS = tuple(
+    tuple(perm[cell // 9] * 9 + perm[cell % 9] for cell in range(81))
+    for perm in POSITION_PERMS
+)
+
+# MASK_PERMS[t][mask] is the 9-bit mask moved by transform t
+MASK_PERMS = tuple(
+    tuple(sum(1 << perm[bit] for bit in BIT_INDICES[mask]) for mask in range(512))
+    for perm in POSITION_PERMS
+)
+
+# INVERSE[t] is the transform which undoes transform t
+INVERSE = tuple(
+    next(
+        u
+        for u in range(8)
+        if all(POSITION_PERMS[u][moved] == pos for pos, moved in enumerate(perm))
+    )
+    for perm in POSITION_PERMS
+)
+
+
+def _transformed_key(engine: BitBoard, t: int) -> Tuple:
+    perm, mask_perm = POSITION_PERMS[t], MASK_PERMS[t]
+    marks_a, marks_b = [0] * 9, [0] * 9
+    for tbl in range(9):
+        marks_a[perm[tbl]] = mask_perm[engine.marks[0][tbl]]
+        marks_b[perm[tbl]] = mask_perm[engine.marks[1][tbl]]
+    forced = -1 if engine.forced == -1 else perm[engine.forced]
+    return (tuple(marks_a), tuple(marks_b), forced, engine.turn)
+
+
+def transform(position, t: int) -> BitBoard:
+    """Apply transform t to a Board or BitBoard.
+
+    Arguments:
+        position -- Board or BitBoard
+        t {int} -- transform index (0 .. 7)
+
+    Returns:
+        BitBoard -- transformed engine without move history
+    """
+    engine = position if isinstance(position, BitBoard) else position.engine
+    marks_a, marks_b, forced, turn = _transformed_key(engine, t)
+    other = BitBoard()
+    other.marks = [list(marks_a), list(marks_b)]
+    other.forced = forced
+    other.turn = turn
+    other.ply = engine.ply
+    other.update_status()
+    other.hash = other.compute_hash()
+    return other
+
+
+def canonical_key(position) -> Tuple[Tuple, int]:
+    """Smallest position key (see BitBoard.key) of the 8 symmetric
+        positions and the transform which leads to it.
+
+    Arguments:
+        position -- Board or BitBoard
+
+    Returns:
+        Tuple[Tuple, int] -- canonical key and transform index
+    """
+    engine = position if isinstance(position, BitBoard) else position.engine
+    best_key, best_t = engine.key(), 0
+    for t in range(1, 8):
+        key = _transformed_key(engine, t)
+        if key < best_key:
+            best_key, best_t = key, t
+    return best_key, best_t
+
+
+def canonicalize(position) -> Tuple[BitBoard, int]:
+    """Map a position to the canonical representative of its 8 symmetric
+        positions. Moves of the canonical position are mapped back with
+        CELL_PERMS[INVERSE[t]].
+
+    Arguments:
+        position -- Board or BitBoard
+
+    Returns:
+        Tuple[BitBoard, int] -- canonical engine and the transform index
+                                which maps the position to it
+    """
+    _, t = canonical_key(position)
+    return transform(position, t), t
+
+
+def canonical_hash(position) -> int:
+    """Zobrist hash of the canonical representative, equal for all 8
+        symmetric positions.
+    """
+    return canonicalize(position)[0].hash
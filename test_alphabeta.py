@@ -0,0 +1,105 @@
+import random
+
+from alphabeta import (
+    EXACT,
+    LOWER,
+    WIN_SCORE,
+    AlphaBeta,
+    TranspositionTable,
+    from_tt_value,
+    to_tt_value,
+)
+from board import Board
+from testing import play_random
+
+
+def winning_board() -> Board:
+    # X owns tables 1 and 2 and is one move away from table 3
+    board_dict = {i: {j: 0 for j in range(1, 10)} for i in range(1, 10)}
+    for pos in [1, 2, 3]:
+        board_dict[1][pos] = "X"
+        board_dict[2][pos] = "X"
+    board_dict[3][1] = "X"
+    board_dict[3][2] = "X"
+    board_dict[4][3] = "O"
+    board_dict[5][3] = "O"
+    board_dict[6][3] = "O"
+    return Board(board_dict=board_dict, insertion_order=[[6, 3]])
+
+
+def test_finds_winning_move():
+    result = AlphaBeta(tt_bits=12).search(winning_board(), max_depth=3)
+    assert result.move == (3, 3)
+    assert result.value == WIN_SCORE - 1
+    # the search stops once the result is known
+    assert result.depth == 1
+
+
+def test_search_is_deterministic():
+    board = Board()
+    board.push(5, 5)
+    first = AlphaBeta(tt_bits=14).search(board, max_depth=4)
+    second = AlphaBeta(tt_bits=14).search(board, max_depth=4)
+    assert first.move == second.move
+    assert first.value == second.value
+    assert first.nodes == second.nodes
+    assert first.move in board.legal_moves()
+    assert first.nodes_per_sec > 0
+    assert 0 < first.tt_hit_rate < 1
+    # the board is not changed by the search
+    assert board.insertion_order == [[5, 5]]
+
+
+def test_time_limit():
+    result = AlphaBeta(tt_bits=12).search(Board(), time_limit=0.2)
+    assert result.move in Board().legal_moves()
+    assert result.depth >= 1
+
+
+def test_transposition_table_replacement():
+    tt = TranspositionTable(size_bits=2)
+    tt.store(1, 5, 10, EXACT, 3)
+    # shallower result of another position in the same slot is dropped
+    tt.store(5, 2, 20, EXACT, 4)
+    assert tt.probe(1)[2] == 10
+    assert tt.probe(5) is None
+    # same position is always replaced
+    tt.store(1, 1, 30, LOWER, 7)
+    assert tt.probe(1)[1:5] == (1, 30, LOWER, 7)
+    # entries of an older search are replaced
+    tt.new_search()
+    tt.store(5, 0, 40, EXACT, 2)
+    assert tt.probe(5)[2] == 40
+    assert tt.probe(1) is None
+    assert len(tt) == 4
+    assert tt.hit_rate == 0.5
+
+
+def test_tt_win_scores_are_node_relative():
+    # a win 3 plies below a node stored at ply 2 is a win 5 plies below
+    # the root, probed at ply 4 it is 7 plies below the root
+    stored = to_tt_value(WIN_SCORE - 5, 2)
+    assert stored == WIN_SCORE - 3
+    assert from_tt_value(stored, 4) == WIN_SCORE - 7
+    assert from_tt_value(to_tt_value(-WIN_SCORE + 5, 2), 4) == -WIN_SCORE + 7
+    assert from_tt_value(to_tt_value(42, 2), 4) == 42
+
+
+def test_tt_reuse_keeps_distance_to_win():
+    # the positions after a searched root hit entries stored at another ply
+    for seed in (9, 41):
+        rng = random.Random(seed)
+        board = play_random(Board(), rng, rng.randint(40, 60))
+        searcher = AlphaBeta(tt_bits=16)
+        searcher.search(board, max_depth=4)
+        for move in board.legal_moves()[:5]:
+            child = Board.from_trusted(
+                {tbl: dict(table) for tbl, table in board.state.items()},
+                list(board.insertion_order),
+                dict(board.finished_tables),
+            )
+            child.push(*move)
+            if child.engine.is_over():
+                continue
+            fresh = AlphaBeta(tt_bits=16).search(child, max_depth=3)
+            assert searcher.search(child, max_depth=3).value == fresh.value
@@ -0,0 +1,83 @@
+import numpy as np
+
+from batch import DRAW, EMPTY, BatchGames, query_moves
+from board import Board
+from codec import encode_position
+from engine import BitBoard, cell_index
+from testing import random_boards
+
+
+def test_random_games_follow_engine_rules():
+    games = BatchGames(200)
+    results = games.play_random(seed=5)
+    assert not games.active.any()
+    assert set(np.unique(results)) <= {1, 2, DRAW}
+
+    for game in range(games.n):
+        engine = BitBoard()
+        for ply in range(games.plies[game]):
+            cell = int(games.moves[game, ply])
+            assert engine.is_legal(cell)
+            engine.push(cell)
+        assert engine.is_over()
+        winner = engine.winner()
+        assert results[game] == (DRAW if winner is None else winner + 1)
+        assert (games.moves[game, games.plies[game] :] == -1).all()
+
+
+def test_legal_mask_matches_engine():
+    games = BatchGames(50)
+    rng = np.random.default_rng(1)
+    engines = [BitBoard() for _ in range(games.n)]
+    for _ in range(30):
+        mask = games.legal_mask().reshape(games.n, 81)
+        for game, engine in enumerate(engines):
+            if games.result[game] == EMPTY:
+                assert list(np.flatnonzero(mask[game])) == engine.legal_moves()
+        moves = games.random_moves(rng)
+        for game, engine in enumerate(engines):
+            if games.result[game] == EMPTY:
+                engine.push(int(moves[game]))
+        games.step(moves)
+
+
+def test_query_moves_matches_is_legal_move():
+    positions = [encode_position(board) for board in random_boards(60, seed=4)]
+    moves = np.tile(np.arange(-1, 82), (len(positions), 1))
+    legal, next_forced = query_moves(positions, moves)
+    assert legal.shape == next_forced.shape == moves.shape
+
+    for i, data in enumerate(positions):
+        board = Board.from_encoding(data)
+        for j, cell in enumerate(moves[i]):
+            tbl_no, pos_no = cell // 9 + 1, cell % 9 + 1
+            if not 0 <= cell < 81:
+                assert not legal[i, j]
+                continue
+            assert legal[i, j] == board.is_legal_move(tbl_no, pos_no)
+            if legal[i, j]:
+                engine = board.engine.copy()
+                engine.push(int(cell))
+                assert next_forced[i, j] == engine.forced
+            else:
+                assert next_forced[i, j] == -1
+
+    # one move per position
+    legal, _ = query_moves(positions, moves[:, 41])
+    assert legal.shape == (len(positions),)
+    assert (legal == query_moves(positions, moves)[0][:, 41]).all()
+
+
+def test_query_moves_sent_to_finished_table():
+    # table 1 is won by X, the last move 2-1 sends O to table 1
+    board_dict = {i: {j: 0 for j in range(1, 10)} for i in range(1, 10)}
+    for pos_no in (1, 2, 3):
+        board_dict[1][pos_no] = "X"
+    for tbl_no, pos_no in ((4, 1), (5, 1), (2, 1)):
+        board_dict[tbl_no][pos_no] = "O" if tbl_no != 2 else "X"
+    board = Board(board_dict=board_dict, insertion_order=[[2, 1, "X"]])
+    moves = np.array([[cell_index(1, 5), cell_index(3, 3), cell_index(9, 9)]])
+    legal, next_forced = query_moves([encode_position(board)], moves)
+    assert legal.tolist() == [[False, True, True]]
+    assert next_forced.tolist() == [[-1, 2, 8]]
+    assert [board.is_legal_move(1, 5), board.is_legal_move(3, 3)] == [False, True]
@@ -1,7 +1,11 @@
 import pytest
-from board import Board
+import random
+from board import DRAWN_TABLE, Board, IllegalInputError, IllegalMoveError
+from codec import encode_position
+from testing import play_random
 from typing import List, Dict
 from itertools import product
+from copy import deepcopy
 
 EMPTY_FIELD = {pos: 0 for pos in range(1, 10)}
 
@@ -143,3 +147,139 @@ def test_legal_move():
             else:
                 assert empty_board.is_legal_move(field, pos) is True
 
+
+
+def test_push_pop_restores_board():
+    rng = random.Random(3)
+    for _ in range(20):
+        board = Board()
+        snapshots = []
+        while board.legal_moves() and not board.player_won_game():
+            snapshots.append(
+                (
+                    deepcopy(board.state),
+                    dict(board.finished_tables),
+                    deepcopy(board.insertion_order),
+                    board.legal_moves(),
+                )
+            )
+            board.push(*rng.choice(board.legal_moves()))
+
+        while snapshots:
+            board.pop()
+            state, finished_tbl, insertion_order, legal_moves = snapshots.pop()
+            assert board.state == state
+            assert board.finished_tables == finished_tbl
+            assert board.insertion_order == insertion_order
+            assert board.legal_moves() == legal_moves
+
+        assert board.engine.marks == [[0] * 9, [0] * 9]
+        with pytest.raises(IllegalMoveError):
+            board.pop()
+
+
+def test_push_illegal_move():
+    board = Board()
+    board.push(5, 1)
+    with pytest.raises(IllegalMoveError):
+        board.push(5, 2)
+    assert board.insertion_order == [[5, 1]]
+    assert board.state[1][1] == 0
+
+
+def test_drawn_table():
+    # X O X / X O O / O X _ is full and won by nobody after X plays 1-9
+    board_state = {i: {j: 0 for j in range(1, 10)} for i in range(1, 10)}
+    for pos, player in zip(range(1, 9), "XOXXOOOX"):
+        board_state[1][pos] = player
+    board = Board(board_dict=board_state, insertion_order=[[9, 1]])
+    assert board.finished_tables[1] == 0
+
+    board.push(1, 9)
+    assert board.finished_tables[1] == DRAWN_TABLE
+    assert not board.player_won_game()
+    # the next move is sent to table 9
+    assert board.legal_moves() == [(9, pos) for pos in range(1, 10)]
+
+    board.pop()
+    assert board.finished_tables[1] == 0
+    board_state[1][9] = "X"
+    board = Board(board_dict=board_state, insertion_order=[[2, 1]])
+    assert board.finished_tables[1] == DRAWN_TABLE
+    # sent to the drawn table: play anywhere except in finished tables
+    assert all(tbl_no != 1 for tbl_no, pos_no in board.legal_moves())
+    assert len(board.legal_moves()) == 8 * 9
+
+
+def test_next_move_returns_winner(capsys):
+    rng = random.Random(2)
+    board = Board()
+    players = ["X", "O"]
+    winner = None
+    while winner is None and board.legal_moves():
+        winner = board.next_move(*rng.choice(board.legal_moves()), players[0])
+        players.reverse()
+    assert winner == board.get_winner()
+    with pytest.raises(IllegalMoveError):
+        board.next_move(10, 1, players[0])
+    # nothing is printed, neither for the win nor for the illegal move
+    assert capsys.readouterr().out == ""
+
+
+def same_position(board: Board, other: Board) -> bool:
+    return (
+        board.legal_moves() == other.legal_moves()
+        and board.finished_tables == other.finished_tables
+        and board.engine.marks == other.engine.marks
+        and board.engine.hash == other.engine.hash
+        and board.engine.turn == other.engine.turn
+        and board.get_winner() == other.get_winner()
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_fast_constructors_match_init(seed):
+    rng = random.Random(seed)
+    played = play_random(Board(), rng, rng.randint(0, 70))
+    board = Board(
+        board_dict=deepcopy(played.state),
+        insertion_order=deepcopy(played.insertion_order),
+    )
+    trusted = Board.from_trusted(
+        deepcopy(board.state),
+        deepcopy(board.insertion_order),
+        deepcopy(board.finished_tables),
+    )
+    assert same_position(trusted, board)
+    assert same_position(Board.from_encoding(encode_position(played)), played)
+    validated = Board.validated(
+        deepcopy(played.state), deepcopy(played.insertion_order)
+    )
+    assert same_position(validated, board)
+
+
+def test_validated_rejects_bad_input():
+    board = play_random(Board(), random.Random(3), 12)
+    state, order = board.state, board.insertion_order
+
+    missing = deepcopy(state)
+    del missing[9]
+    unknown = deepcopy(state)
+    unknown[order[0][0]][order[0][1]] = "Z"
+    extra_marks = deepcopy(state)
+    for pos in range(1, 10):
+        extra_marks[9][pos] = extra_marks[9][pos] or "X"
+    swapped = deepcopy(order)
+    swapped[0], swapped[1] = swapped[1], swapped[0]
+    bad_inputs = [
+        (missing, order),
+        (unknown, order),
+        (extra_marks, order),
+        (state, order[:-1]),
+        (state, swapped),
+        (state, order[:-1] + [[10, 1]]),
+        (state, order[:-1] + [order[0]]),
+    ]
+    for board_dict, insertion_order in bad_inputs:
+        with pytest.raises(IllegalInputError):
+            Board.validated(deepcopy(board_dict), deepcopy(insertion_order))
@@ -0,0 +1,74 @@
+import random
+import struct
+
+import pytest
+
+from alphabeta import AlphaBetaPlayer
+from board import Board
+from book import BookError, OpeningBook, build_book, measure_hit_rate, write_book
+from engine import BitBoard, cell_index
+from mcts import MCTSPlayer
+from symmetry import canonical_hash
+
+
+@pytest.fixture(scope="module")
+def book_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("book") / "book.bin")
+    write_book(build_book(plies=2, depth=2), path)
+    return path
+
+
+def test_build_book_symmetry_reduced():
+    entries = build_book(plies=1, depth=1)
+    # the empty board and the 15 first moves which differ by symmetry
+    assert len(entries) == 16
+    assert canonical_hash(BitBoard()) in entries
+
+
+def test_lookup_symmetric_positions(book_path):
+    rng = random.Random(3)
+    with OpeningBook(book_path) as book:
+        assert len(book) == len(build_book(plies=2, depth=2))
+        for _ in range(50):
+            engine = BitBoard()
+            for _ in range(rng.randint(0, 2)):
+                engine.push(rng.choice(engine.legal_moves()))
+            move = book.lookup(engine)
+            assert move is not None
+            assert engine.is_legal(cell_index(*move))
+        assert book.hit_rate == 1.0
+
+        engine = BitBoard()
+        for _ in range(6):
+            engine.push(rng.choice(engine.legal_moves()))
+        assert book.lookup(engine) is None
+        assert measure_hit_rate(book, plies=2, games=20) == 1.0
+
+
+def test_players_use_book(book_path):
+    board = Board("X", "O")
+    with OpeningBook(book_path) as book:
+        players = [MCTSPlayer(iterations=10, book=book), AlphaBetaPlayer(book=book)]
+        for player in players:
+            assert player(board) == book.lookup(board)
+            assert player.last_result is None
+
+
+def test_no_book(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"UTTT\x01\x00")
+    with pytest.raises(BookError):
+        OpeningBook(str(path))
+    for data in (b"", b"UTT", b"UTTB\x01\x04" + b"\x00" * 9):
+        path.write_bytes(data)
+        with pytest.raises(BookError):
+            OpeningBook(str(path))
+
+
+def test_probe_full_table(tmp_path):
+    # 2 slots, both taken by other keys
+    path = tmp_path / "full.bin"
+    path.write_bytes(b"UTTB\x01\x01" + struct.pack("<QBQB", 5, 0, 7, 0))
+    with OpeningBook(str(path)) as book:
+        assert book.probe(5) == 0
+        assert book.probe(4) is None
@@ -0,0 +1,115 @@
+import pytest
+
+from board import Board
+from codec import (
+    GAMES,
+    NO_MOVE,
+    POSITION_SIZE,
+    POSITIONS,
+    CodecError,
+    RecordReader,
+    RecordWriter,
+    decode_board_dict,
+    decode_game,
+    decode_position,
+    encode_game,
+    encode_position,
+    position_to_board_args,
+)
+from testing import random_boards
+
+
+def test_position_roundtrip():
+    for board in random_boards(100):
+        data = encode_position(board)
+        assert len(data) == POSITION_SIZE
+        engine = decode_position(data)
+        assert engine.key() == board.engine.key()
+        assert engine.finished == board.engine.finished
+        assert engine.winner() == board.engine.winner()
+        assert engine.hash == board.engine.hash
+        assert decode_board_dict(data, ("A", "B")) == engine.to_board_dict(("A", "B"))
+
+        restored = Board.set_board(**position_to_board_args(data))
+        for tbl_no in range(1, 10):
+            # Board marks a won table as completely owned by the winner
+            if board.finished_tables[tbl_no] in ("X", "O"):
+                owner = board.finished_tables[tbl_no]
+                assert set(restored.state[tbl_no].values()) == {owner}
+            else:
+                assert restored.state[tbl_no] == board.state[tbl_no]
+        assert restored.finished_tables == board.finished_tables
+        assert restored.legal_moves() == board.legal_moves()
+
+
+def test_position_without_history():
+    board = next(random_boards(1, seed=3))
+    data = encode_position(board)
+    engine = decode_position(data)
+    # the engine has no move history, a last move is found from the marks
+    assert encode_position(engine)[21] != NO_MOVE
+    assert decode_position(encode_position(engine)).key() == engine.key()
+    assert encode_position(Board())[21] == NO_MOVE
+
+
+def test_game_roundtrip():
+    for board in random_boards(20, seed=1):
+        data = encode_game(board.insertion_order)
+        assert len(data) == len(board.insertion_order)
+        assert decode_game(data) == board.insertion_order
+
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_record_file(tmp_path, use_mmap):
+    boards = list(random_boards(30, seed=2))
+    path = str(tmp_path / "positions.uttt")
+    with RecordWriter(path, POSITIONS) as writer:
+        for board in boards:
+            writer.write(encode_position(board))
+    assert writer.count == 30
+
+    with RecordReader(path, use_mmap=use_mmap) as reader:
+        assert reader.kind == POSITIONS
+        keys = [engine.key() for engine in reader.positions()]
+    assert keys == [board.engine.key() for board in boards]
+
+    path = str(tmp_path / "games.uttt")
+    with RecordWriter(path, GAMES) as writer:
+        writer.write(encode_game(boards[0].insertion_order))
+    with RecordWriter(path, GAMES, append=True) as writer:
+        writer.write(encode_game(boards[1].insertion_order))
+    with RecordReader(path, use_mmap=use_mmap) as reader:
+        assert list(reader.games()) == [
+            boards[0].insertion_order,
+            boards[1].insertion_order,
+        ]
+
+
+def test_invalid_data(tmp_path):
+    with pytest.raises(CodecError):
+        decode_position(b"\x00" * 5)
+    path = tmp_path / "broken.uttt"
+    path.write_bytes(b"nope, no records")
+    with pytest.raises(CodecError):
+        RecordReader(str(path))
+    path.write_bytes(b"")
+    with pytest.raises(CodecError):
+        RecordReader(str(path))
+
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_records_outlive_reader(tmp_path, use_mmap):
+    boards = list(random_boards(5, seed=4))
+    path = str(tmp_path / "positions.uttt")
+    with RecordWriter(path, POSITIONS) as writer:
+        for board in boards:
+            writer.write(encode_position(board))
+    with RecordReader(path, use_mmap=use_mmap) as reader:
+        for record in reader:
+            decode_position(record)
+    # the loop variable still holds the last record when the reader closes
+    assert decode_position(record).key() == boards[-1].engine.key()
+    with RecordReader(path, use_mmap=use_mmap) as reader:
+        for record in reader:
+            break
+    assert record == encode_position(boards[0])
@@ -0,0 +1,134 @@
+import random
+from itertools import product
+
+from board import Board
+from board import test_winning as dict_test_winning
+from engine import (
+    WIN_LINES,
+    WIN_TABLE,
+    BitBoard,
+    cell_coords,
+    cell_index,
+)
+
+
+def reference_is_legal(board: Board, tbl_no: int, pos_no: int) -> bool:
+    """Rules of the dict based Board implementation"""
+    if not board.insertion_order:
+        return True
+    if board.finished_tables[tbl_no] != 0:
+        return False
+    if board.state[tbl_no][pos_no] != 0:
+        return False
+    last_pos = board.insertion_order[-1][1]
+    return last_pos == tbl_no or board.finished_tables[last_pos] != 0
+
+
+def test_cell_index_roundtrip():
+    for tbl_no, pos_no in product(range(1, 10), range(1, 10)):
+        assert cell_coords(cell_index(tbl_no, pos_no)) == (tbl_no, pos_no)
+    assert cell_index(1, 1) == 0
+    assert cell_index(9, 9) == 80
+
+
+def test_win_table_matches_test_winning():
+    for mask in range(512):
+        table = {pos: ("X" if mask >> (pos - 1) & 1 else 0) for pos in range(1, 10)}
+        assert WIN_TABLE[mask] is dict_test_winning(table, "X")
+    assert len(WIN_LINES) == 8
+
+
+def test_board_dict_roundtrip():
+    board_dict = {i: {j: 0 for j in range(1, 10)} for i in range(1, 10)}
+    board_dict[2][3] = "X"
+    board_dict[7][5] = "O"
+    engine = BitBoard.from_board_dict(board_dict, [[2, 3], [7, 5]])
+    assert engine.to_board_dict() == board_dict
+    assert engine.forced == 4
+    assert engine.turn == 0
+    assert engine.ply == 2
+
+
+def test_won_table_owned_by_winner():
+    board_dict = {i: {j: 0 for j in range(1, 10)} for i in range(1, 10)}
+    for pos in [3, 5, 7]:
+        board_dict[4][pos] = "O"
+    board_dict[4][1] = "X"
+    engine = BitBoard.from_board_dict(board_dict, [[4, 1], [4, 7]])
+    assert engine.won == [0, 1 << 3]
+    assert engine.marks[1][3] == 0x1FF
+    assert engine.marks[0][3] == 0
+    # the forced table 7 is not finished
+    assert engine.forced == 6
+    assert engine.turn == 0
+
+
+def test_legality_parity_random_games():
+    rng = random.Random(7)
+    for _ in range(50):
+        board = Board()
+        players = ["X", "O"]
+        while True:
+            moves = [
+                (tbl_no, pos_no)
+                for tbl_no, pos_no in product(range(1, 10), range(1, 10))
+                if reference_is_legal(board, tbl_no, pos_no)
+            ]
+            assert moves == [
+                (tbl_no, pos_no)
+                for tbl_no, pos_no in product(range(1, 10), range(1, 10))
+                if board.is_legal_move(tbl_no, pos_no)
+            ]
+            assert board.legal_moves() == moves
+            assert board.engine.legal_mask() == sum(
+                1 << cell_index(tbl_no, pos_no) for tbl_no, pos_no in moves
+            )
+            if not moves:
+                break
+            tbl_no, pos_no = rng.choice(moves)
+            player = players[len(board.insertion_order) % 2]
+            board.state[tbl_no][pos_no] = player
+            board.insertion_order.append([tbl_no, pos_no])
+            board.engine.push(cell_index(tbl_no, pos_no))
+            board.update_finished_table(tbl_no)
+            if board.player_won_game():
+                assert dict_test_winning(board.finished_tables, player)
+                assert board.get_winner() == player
+                break
+
+
+def test_incremental_hash():
+    rng = random.Random(11)
+    for _ in range(20):
+        engine = BitBoard()
+        hashes = [engine.hash]
+        while not engine.is_over():
+            engine.push(rng.choice(engine.legal_moves()))
+            assert engine.hash == engine.compute_hash()
+            hashes.append(engine.hash)
+        while engine.history:
+            hashes.pop()
+            engine.pop()
+            assert engine.hash == hashes[-1]
+
+
+def test_incremental_status_matches_rescan():
+    rng = random.Random(5)
+    drawn_seen = False
+    for _ in range(50):
+        engine = BitBoard()
+        while not engine.is_over():
+            engine.push(rng.choice(engine.legal_moves()))
+            rescan = engine.copy()
+            rescan.update_status()
+            assert (engine.won, engine.drawn, engine.finished) == (
+                rescan.won,
+                rescan.drawn,
+                rescan.finished,
+            )
+            assert engine.winner() == rescan.winner()
+            drawn_seen = drawn_seen or bool(engine.drawn)
+        if engine.winner() is None:
+            assert engine.finished == 0x1FF
+            assert engine.legal_moves() == []
+    assert drawn_seen
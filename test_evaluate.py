@@ -0,0 +1,70 @@
+import json
+from functools import partial
+
+import numpy as np
+import pytest
+
+from alphabeta import AlphaBeta
+from batch import BatchGames
+from board import Board
+from codec import decode_position, encode_position
+from engine import BitBoard
+from evaluate import DEFAULT_WEIGHTS, Weights, evaluate_batch, evaluate_position
+from testing import random_boards
+
+
+def random_engines(count: int, seed: int):
+    return [board.engine for board in random_boards(count, seed, max_plies=71)]
+
+
+def test_weights_config(tmp_path):
+    weights = Weights.from_dict({"table_won": 50})
+    assert weights.table_won == 50
+    assert weights.meta_line == DEFAULT_WEIGHTS.meta_line
+    with pytest.raises(ValueError):
+        Weights.from_dict({"corners": 3})
+    path = tmp_path / "weights.json"
+    path.write_text(json.dumps(weights.to_dict()))
+    assert Weights.load(str(path)) == weights
+
+
+def test_evaluate_position_features():
+    board = Board()
+    assert evaluate_position(board) == DEFAULT_WEIGHTS.free_choice
+    # X in the center of table 5 opens 4 lines, O is sent to table 5
+    board.push(5, 5)
+    assert evaluate_position(board) == -4 * DEFAULT_WEIGHTS.table_line
+    weights = Weights(table_line=0)
+    assert evaluate_position(board.engine, weights) == 0
+
+
+def test_evaluate_batch_matches_single():
+    engines = random_engines(300, seed=2)
+    encoded = [encode_position(engine) for engine in engines]
+    # the evaluation only sees what the encoding keeps
+    expected = [evaluate_position(decode_position(data)) for data in encoded]
+    assert evaluate_batch(encoded).tolist() == expected
+    array = np.frombuffer(b"".join(encoded), dtype=np.uint8).reshape(-1, 22)
+    weights = Weights(meta_threat=7, forced_threat=3)
+    expected = [evaluate_position(decode_position(data), weights) for data in encoded]
+    assert evaluate_batch(array, weights).tolist() == expected
+
+
+def test_from_positions_matches_engine():
+    engines = random_engines(100, seed=4)
+    games = BatchGames.from_positions([encode_position(e) for e in engines])
+    for game, engine in enumerate(engines):
+        decoded = decode_position(encode_position(engine))
+        assert games.turn[game] == decoded.turn
+        assert games.forced[game] == decoded.forced
+        assert games.marks[game].tolist() == decoded.marks
+        mask = games.legal_mask(np.array([game])).reshape(81)
+        assert list(np.flatnonzero(mask)) == (
+            [] if decoded.is_over() else decoded.legal_moves()
+        )
+
+
+def test_alphabeta_with_evaluator():
+    searcher = AlphaBeta(tt_bits=12, evaluator=partial(evaluate_position))
+    result = searcher.search(BitBoard(), max_depth=2)
+    assert result.move is not None
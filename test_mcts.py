@@ -0,0 +1,62 @@
+from board import Board
+from engine import CELL_COORDS, cell_index
+from mcts import MCTS, MCTSPlayer
+
+
+def test_search_returns_legal_move():
+    board = Board()
+    board.push(5, 5)
+    result = MCTS(seed=1).search(board, iterations=200)
+    assert result.move in board.legal_moves()
+    assert result.playouts == 200
+    assert sum(result.visits.values()) == 200
+    assert set(result.visits) == set(board.legal_moves())
+    assert result.playouts_per_sec > 0
+    # the search must not change the board
+    assert board.insertion_order == [[5, 5]]
+
+
+def test_search_from_board_dict():
+    board_dict = {i: {j: 0 for j in range(1, 10)} for i in range(1, 10)}
+    board_dict[3][7] = "X"
+    result = MCTS(seed=1).search((board_dict, [[3, 7]]), iterations=50)
+    assert result.move[0] == 7
+
+
+def test_finds_winning_move():
+    # X owns tables 1 and 2 and is one move away from table 3
+    board_dict = {i: {j: 0 for j in range(1, 10)} for i in range(1, 10)}
+    for pos in [1, 2, 3]:
+        board_dict[1][pos] = "X"
+        board_dict[2][pos] = "X"
+    board_dict[3][1] = "X"
+    board_dict[3][2] = "X"
+    board_dict[4][3] = "O"
+    board_dict[5][3] = "O"
+    board_dict[6][3] = "O"
+    board = Board(board_dict=board_dict, insertion_order=[[6, 3]])
+    result = MCTS(seed=3).search(board, iterations=300)
+    assert result.move == (3, 3)
+    assert result.value > 0.9
+
+
+def test_subtree_reuse():
+    board = Board()
+    mcts = MCTS(seed=2)
+    first = mcts.search(board, iterations=300)
+    board.push(*first.move)
+    child = mcts.root.child(cell_index(*first.move))
+    grandchild = max(child.children, key=lambda node: node.visits)
+    board.push(*CELL_COORDS[grandchild.move])
+    visits = grandchild.visits
+
+    mcts.search(board, iterations=10)
+    assert mcts.root is grandchild
+    assert mcts.root.visits == visits + 10
+
+
+def test_player_callable():
+    board = Board()
+    player = MCTSPlayer(iterations=50, seed=0)
+    assert player(board) in board.legal_moves()
+    assert player.last_result.playouts == 50
@@ -0,0 +1,40 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from board import Board
+from engine import BitBoard
+from parallel_mcts import ParallelMCTSPlayer, parallel_search
+
+
+def test_bytes_roundtrip():
+    board = Board()
+    for move in [(5, 5), (5, 1), (1, 5), (5, 9), (9, 5), (5, 3), (3, 5), (5, 7)]:
+        board.push(*move)
+    data = board.engine.to_bytes()
+    assert len(data) == 24
+    engine = BitBoard.from_bytes(data)
+    assert engine.key() == board.engine.key()
+    assert engine.won == board.engine.won
+    assert engine.legal_moves() == board.engine.legal_moves()
+
+
+def test_parallel_search_merges_visits():
+    board = Board()
+    board.push(5, 5)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        result = parallel_search(
+            board, workers=3, iterations=60, seed=1, executor=executor
+        )
+    assert result.playouts == 180
+    assert sum(result.visits.values()) == 180
+    assert result.move in board.legal_moves()
+
+
+def test_parallel_player():
+    board = Board()
+    player = ParallelMCTSPlayer(workers=2, iterations=20, seed=0)
+    try:
+        assert player(board) in board.legal_moves()
+        board.push(*player.last_result.move)
+        assert player(board) in board.legal_moves()
+    finally:
+        player.close()
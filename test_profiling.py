@@ -0,0 +1,48 @@
+import pstats
+
+import profiling
+from board import Board
+
+
+def test_disabled_board_is_untouched():
+    plain = Board.__dict__["is_legal_move"]
+    profiling.enable()
+    assert profiling.is_enabled()
+    assert Board.__dict__["is_legal_move"] is not plain
+    profiling.disable()
+    assert not profiling.is_enabled()
+    for name in profiling.INSTRUMENTED:
+        assert not hasattr(Board.__dict__[name], "__wrapped__")
+
+
+def test_instrumented_counts():
+    board = Board()
+    with profiling.instrumented() as stats:
+        for tbl_no in range(1, 10):
+            board.is_legal_move(tbl_no, 1)
+        board.next_move(1, 5, "X")
+        board.player_won_game()
+        str(board)
+    assert not profiling.is_enabled()
+    # next_move checks its move and updates the table
+    assert stats["is_legal_move"].calls == 10
+    assert stats["next_move"].calls == 1
+    assert stats["update_finished_table"].calls == 1
+    assert stats["player_won_game"].calls == 1
+    assert stats["__str__"].calls == 1
+    assert stats["__str__"].seconds > 0
+    assert stats["next_move"].mean == stats["next_move"].seconds
+
+    # counters stay untouched while disabled
+    board.is_legal_move(5, 1)
+    assert profiling.snapshot() == stats
+    profiling.reset()
+    assert profiling.snapshot()["is_legal_move"].calls == 0
+
+
+def test_profile(tmp_path):
+    path = str(tmp_path / "board.prof")
+    with profiling.profile(path):
+        str(Board())
+    functions = pstats.Stats(path).stats
+    assert any(name == "__str__" for _, _, name in functions)
@@ -0,0 +1,79 @@
+import random
+from copy import deepcopy
+
+from board import Board
+from render import ANSI_BOLD, render, render_compact
+
+
+def legacy_str(board: Board) -> str:
+    """Board.__str__ before the renderer was introduced"""
+    x = deepcopy(board.state)
+    for i in range(1, 10):
+        for j in range(1, 10):
+            if x[i][j] == 0:
+                x[i][j] = " "
+    rows = ["+" + "---+" * 8 + "---+" + "\n"]
+    for counter in [0, 3, 6]:
+        for first in [1, 4, 7]:
+            if first != 1:
+                rows.append("|" + "   +" * 8 + "   |" + "\n")
+            rows.append(
+                "".join(
+                    [
+                        "|" + f" {x[j][first]}   {x[j][first + 1]}   {x[j][first + 2]} "
+                        for j in range(counter + 1, counter + 4)
+                    ]
+                    + ["|"]
+                )
+                + "\n"
+            )
+        rows.append("+" + "---+" * 8 + "---+" + "\n")
+    rows.append("-" * 37 + "\n")
+    return "".join(rows)
+
+
+def test_render_matches_legacy():
+    rng = random.Random(5)
+    for _ in range(20):
+        board = Board()
+        assert str(board) == legacy_str(board)
+        while board.legal_moves() and not board.player_won_game():
+            board.push(*rng.choice(board.legal_moves()))
+            assert str(board) == legacy_str(board)
+            if rng.random() < 0.2:
+                board.pop()
+                assert str(board) == legacy_str(board)
+
+
+def test_render_board_dict():
+    state = {tbl: {pos: 0 for pos in range(1, 10)} for tbl in range(1, 10)}
+    state[3].update({1: "X", 5: "X", 9: "X"})
+    state[7][2] = "O"
+    board = Board(board_dict=state, insertion_order=[[3, 9], [7, 2]])
+    assert str(board) == legacy_str(board)
+
+
+def test_render_cache():
+    board = Board()
+    text = str(board)
+    # no move, no new string
+    assert render(board) is text
+    board.push(5, 5)
+    str(board)
+    parts = list(board._render_cache.parts)
+    board.push(5, 1)
+    assert str(board) == legacy_str(board)
+    new_parts = board._render_cache.parts
+    assert sum(new != old for new, old in zip(new_parts, parts)) == 1
+
+
+def test_render_compact():
+    board = Board()
+    board.push(1, 1)
+    board.push(1, 5)
+    line = render_compact(board)
+    assert line == "X...O....|" + "|".join(["." * 9] * 8)
+    assert "\n" not in line
+    colored = render_compact(board, ansi=True)
+    assert "\033[31mX" in colored and "\033[34mO" in colored
+    assert ANSI_BOLD not in colored
@@ -0,0 +1,42 @@
+from codec import encode_game
+from replay import replay_game, replay_games
+from testing import random_boards
+
+
+def test_replay_complete_games():
+    for board in random_boards(30, max_plies=None):
+        result = replay_game(board.insertion_order)
+        assert result.illegal_ply is None
+        assert result.length == len(board.insertion_order)
+        assert result.finished
+        assert result.winner == board.engine.winner()
+        assert replay_game(encode_game(board.insertion_order)) == result
+
+
+def test_first_illegal_ply():
+    # the second move has to be played in table 5
+    assert replay_game([[1, 5], [4, 4], [5, 5]]).illegal_ply == 1
+    assert replay_game([[1, 5], [5, 10]]).illegal_ply == 1
+    assert replay_game([40, 40]).illegal_ply == 1
+    assert replay_game([]).length == 0
+
+    board = next(random_boards(1, seed=4, max_plies=None))
+    # a move after the end of the game is illegal
+    moves = board.insertion_order + [[1, 1]]
+    result = replay_game(moves)
+    assert result.illegal_ply == len(board.insertion_order)
+    assert result.winner == board.engine.winner()
+
+
+def test_replay_games_lazy_and_parallel():
+    games = [
+        board.insertion_order
+        for board in random_boards(40, seed=1, max_plies=None)
+    ]
+    games.append([[1, 5], [4, 4]])
+    expected = [replay_game(game) for game in games]
+
+    results = replay_games(iter(games))
+    assert next(results) == expected[0]
+    assert list(results) == expected[1:]
+    assert list(replay_games(games, workers=2, chunksize=7)) == expected
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from codec import decode_position
+from selfplay import (
+    RandomPlayer,
+    decode_sample,
+    encode_sample,
+    make_bot,
+    play_game,
+    read_samples,
+    run_selfplay,
+    shard_path,
+)
+
+
+def test_sample_round_trip():
+    position = bytes(range(22))
+    sample = decode_sample(encode_sample(position, -1, {3: 70000, 40: 5}))
+    assert sample.position == position
+    assert sample.result == -1
+    assert sample.visits == {3: 0xFFFF, 40: 5}
+
+
+def test_make_bot():
+    assert isinstance(make_bot("random", 1), RandomPlayer)
+    assert make_bot("mcts:10", 1).iterations == 10
+    assert make_bot("alphabeta:2").max_depth == 2
+    with pytest.raises(ValueError):
+        make_bot("oracle")
+
+
+def test_play_game_records_moves():
+    winner, moves = play_game([RandomPlayer(1), make_bot("mcts:20", 2)])
+    assert winner in (0, 1, None)
+    for ply, (position, side, visits) in enumerate(moves):
+        engine = decode_position(position)
+        assert side == ply % 2 == engine.turn
+        assert all(engine.is_legal(cell) for cell in visits)
+
+
+def test_run_selfplay_and_resume(tmp_path):
+    out_dir = str(tmp_path)
+    report = run_selfplay(out_dir, 5, ("random", "mcts:10"), shard_size=2, workers=0)
+    assert report.games == 5 and report.skipped_shards == 0
+    assert sum(report.wins.values()) == 5
+    assert report.games_per_hour > 0
+    samples = list(read_samples(out_dir))
+    assert len(samples) == report.positions
+    assert all(sample.result in (-1, 0, 1) for sample in samples)
+
+    # a lost shard is played again with the same seed
+    with open(shard_path(out_dir, 1), "rb") as shard_file:
+        expected = shard_file.read()
+    os.remove(shard_path(out_dir, 1))
+    report = run_selfplay(out_dir, 5, ("random", "mcts:10"), shard_size=2, workers=1)
+    assert report.games == 2 and report.skipped_shards == 2
+    with open(shard_path(out_dir, 1), "rb") as shard_file:
+        assert shard_file.read() == expected
+
+
+def test_mirror_match_wins_per_seat(tmp_path):
+    report = run_selfplay(str(tmp_path), 4, ("random", "random"), workers=0)
+    assert set(report.wins) == {"bot0", "bot1", "draw"}
+    assert sum(report.wins.values()) == 4
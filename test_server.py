@@ -0,0 +1,100 @@
+import asyncio
+import random
+
+from server import GameClient, GameServer, load_test, percentile
+
+
+def run_with_server(scenario):
+    async def main():
+        server = GameServer()
+        port = await server.start("127.0.0.1", 0)
+        try:
+            return await scenario(server, port)
+        finally:
+            await server.close()
+
+    return asyncio.run(main())
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) == 0.0
+
+
+def test_play_game():
+    async def scenario(server, port):
+        client = await GameClient.connect("127.0.0.1", port)
+        game = await client.request({"op": "new"})
+        assert game["ok"] and game["next"] == "X" and len(game["legal"]) == 81
+        game_id = game["game"]
+
+        bad = await client.request(
+            {"op": "move", "game": game_id, "tbl": 1, "pos": 1, "player": "O"}
+        )
+        assert not bad["ok"]
+        rng = random.Random(1)
+        state, moves = game, 0
+        while not state["over"]:
+            tbl_no, pos_no = rng.choice(state["legal"])
+            state = await client.request(
+                {"op": "move", "game": game_id, "tbl": tbl_no, "pos": pos_no}
+            )
+            assert state["ok"]
+            moves += 1
+        assert state["winner"] is not None or not state["legal"]
+        over = await client.request(
+            {"op": "move", "game": game_id, "tbl": 2, "pos": 2}
+        )
+        assert not over["ok"]
+
+        illegal = await client.request({"op": "new"})
+        state = await client.request(
+            {"op": "move", "game": illegal["game"], "tbl": 10, "pos": 1}
+        )
+        assert not state["ok"]
+
+        metrics = await client.request({"op": "metrics", "game": game_id})
+        assert metrics["moves"] == moves + 2
+        assert (await client.request({"op": "metrics"}))["games"] == 2
+        assert not (await client.request({"op": "fly"}))["ok"]
+        await client.close()
+        await asyncio.sleep(0.05)
+        # games are removed with their connection
+        return len(server.games)
+
+    assert run_with_server(scenario) == 0
+
+
+def test_games_belong_to_their_connection():
+    async def scenario(server, port):
+        owner = await GameClient.connect("127.0.0.1", port)
+        other = await GameClient.connect("127.0.0.1", port)
+        game_id = (await owner.request({"op": "new"}))["game"]
+        requests = [
+            {"op": "move", "game": game_id, "tbl": 5, "pos": 5},
+            {"op": "state", "game": game_id},
+            {"op": "metrics", "game": game_id},
+            {"op": "close", "game": game_id},
+        ]
+        for request in requests:
+            assert not (await other.request(request))["ok"]
+        state = await owner.request({"op": "state", "game": game_id})
+        assert state["ok"] and len(state["legal"]) == 81
+        assert (await owner.request({"op": "close", "game": game_id}))["ok"]
+        await owner.close()
+        await other.close()
+
+    run_with_server(scenario)
+
+
+def test_load_test():
+    async def scenario(server, port):
+        return await load_test("127.0.0.1", port, games=20, connections=4)
+
+    report = run_with_server(scenario)
+    assert report["games"] == 20
+    assert report["moves"] >= 20 * 17
+    assert 0 < report["p50_ms"] <= report["p99_ms"]
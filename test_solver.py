@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+from engine import BitBoard, cell_index
+from mcts import MCTS
+from solver import DRAW, LOSS, Solver, SolverError, empty_cells
+from symmetry import transform
+
+
+def endgame(seed: int, max_empty: int = 8) -> BitBoard:
+    """Random position with few empty cells which is not over"""
+    rng = random.Random(seed)
+    while True:
+        engine = BitBoard()
+        while not engine.is_over() and empty_cells(engine) > max_empty:
+            engine.push(rng.choice(engine.legal_moves()))
+        if not engine.is_over():
+            return engine
+
+
+def reference(engine: BitBoard) -> int:
+    """Plain negamax without memo and move ordering"""
+    if engine.winner() is not None:
+        return LOSS
+    moves = engine.legal_moves()
+    if not moves:
+        return DRAW
+    best = LOSS
+    for cell in moves:
+        engine.push(cell)
+        best = max(best, -reference(engine))
+        engine.pop()
+    return best
+
+
+def test_solve_matches_reference():
+    solver = Solver()
+    for seed in range(8):
+        engine = endgame(seed, max_empty=6)
+        assert solver.can_solve(engine)
+        result = solver.solve(engine)
+        assert result.outcome == reference(engine)
+        # the best move keeps the outcome
+        assert engine.is_legal(cell_index(*result.move))
+        engine.push(cell_index(*result.move))
+        assert -reference(engine) == result.outcome
+
+
+def test_symmetric_positions_share_cache():
+    engine = endgame(3)
+    solver = Solver()
+    result = solver.solve(engine)
+    for t in range(8):
+        other = transform(engine, t)
+        again = solver.solve(other)
+        assert again.nodes == 1
+        assert again.outcome == result.outcome
+        assert other.is_legal(cell_index(*again.move))
+
+
+def test_cache_is_bounded():
+    solver = Solver(cache_size=10)
+    solver.solve(endgame(4))
+    assert len(solver.cache) <= 10
+
+
+def test_node_limit():
+    solver = Solver()
+    assert solver.solve(endgame(5, max_empty=10), max_nodes=1) is None
+
+
+def test_persistence(tmp_path):
+    path = str(tmp_path / "solved.bin")
+    engine = endgame(6)
+    solver = Solver(path=path)
+    result = solver.solve(engine)
+    solver.save()
+    loaded = Solver(path=path)
+    assert len(loaded.cache) == len(solver.cache)
+    again = loaded.solve(engine)
+    assert again.nodes == 1 and again.outcome == result.outcome
+
+    (tmp_path / "other.bin").write_bytes(b"UTTS\x02")
+    with pytest.raises(SolverError):
+        Solver(path=str(tmp_path / "other.bin"))
+
+
+def test_mcts_uses_solver():
+    engine = endgame(7)
+    solver = Solver()
+    result = MCTS(seed=1, solver=solver).search(engine, iterations=50)
+    assert result.playouts == 0
+    assert result.value == (solver.solve(engine).outcome + 1) / 2
+
+    # leaves near the end are solved instead of played out
+    engine = endgame(8, max_empty=16)
+    solver = Solver(max_empty=12, max_open_tables=0)
+    assert not solver.can_solve(engine)
+    result = MCTS(seed=1, solver=solver).search(engine, iterations=30)
+    assert result.move is not None
+    assert solver.cache
@@ -0,0 +1,59 @@
+import random
+
+from engine import WIN_LINES, BitBoard
+from symmetry import (
+    CELL_PERMS,
+    INVERSE,
+    MASK_PERMS,
+    POSITION_PERMS,
+    canonical_hash,
+    canonical_key,
+    canonicalize,
+    transform,
+)
+from testing import play_random
+
+
+def test_permutations():
+    assert len(set(POSITION_PERMS)) == 8
+    for t, perm in enumerate(POSITION_PERMS):
+        assert sorted(perm) == list(range(9))
+        # the center stays and lines are mapped to lines
+        assert perm[4] == 4
+        assert {MASK_PERMS[t][line] for line in WIN_LINES} == set(WIN_LINES)
+        for cell in range(81):
+            assert CELL_PERMS[INVERSE[t]][CELL_PERMS[t][cell]] == cell
+
+
+def test_transform_keeps_rules():
+    rng = random.Random(1)
+    for _ in range(30):
+        engine = play_random(BitBoard(), rng, rng.randrange(1, 50))
+        for t in range(8):
+            other = transform(engine, t)
+            assert other.winner() == engine.winner()
+            assert bin(other.finished).count("1") == bin(engine.finished).count("1")
+            assert sorted(other.legal_moves()) == sorted(
+                CELL_PERMS[t][cell] for cell in engine.legal_moves()
+            )
+
+
+def test_canonical_representative():
+    rng = random.Random(2)
+    for _ in range(30):
+        engine = play_random(BitBoard(), rng, rng.randrange(0, 40))
+        canonical, t = canonicalize(engine)
+        assert canonical.key() == transform(engine, t).key()
+        # all symmetric positions share the canonical key
+        for u in range(8):
+            assert canonical_key(transform(engine, u))[0] == canonical.key()
+        # moves of the canonical position map back to legal moves
+        for cell in canonical.legal_moves():
+            assert engine.is_legal(CELL_PERMS[INVERSE[t]][cell])
+
+
+def test_canonical_hash():
+    rng = random.Random(3)
+    engine = play_random(BitBoard(), rng, 12)
+    hashes = {canonical_hash(transform(engine, t)) for t in range(8)}
+    assert hashes == {canonical_hash(engine)}
@@ -0,0 +1,93 @@
+import json
+
+from board import Board
+from tournament import (
+    Match,
+    MatchResult,
+    compute_elo,
+    play_match,
+    round_robin,
+    run_tournament,
+)
+
+
+class FirstMovePlayer:
+    """Always plays the first legal move"""
+
+    def __init__(self, seed=None, time_limit=None):
+        self.last_result = None
+
+    def __call__(self, board: Board):
+        return board.legal_moves()[0]
+
+
+class IllegalPlayer(FirstMovePlayer):
+    def __call__(self, board: Board):
+        return (10, 10)
+
+
+def result(first, second, winner):
+    return MatchResult(0, first, second, 0, winner, "win", 20, 0.1, {}, {})
+
+
+def test_round_robin():
+    matches = round_robin(["a", "b", "c"], 2)
+    assert len(matches) == 6
+    assert [match.id for match in matches] == list(range(6))
+    assert (matches[0].first, matches[1].first) == ("a", "b")
+
+
+def test_play_match():
+    players = {"first": FirstMovePlayer, "random": "random"}
+    outcome = play_match(Match(0, "first", "random", 1), players)
+    assert outcome.reason in ("win", "draw")
+    assert outcome.moves == sum(outcome.move_counts.values())
+
+    players = {"illegal": IllegalPlayer, "random": "random"}
+    outcome = play_match(Match(1, "illegal", "random", 1), players)
+    assert (outcome.winner, outcome.reason) == ("random", "illegal")
+
+
+def test_compute_elo():
+    results = [result("a", "b", "a")] * 30 + [result("a", "b", "b")] * 10
+    elo = compute_elo(results, ["a", "b"])
+    (a, a_low, a_high), (b, b_low, b_high) = elo["a"], elo["b"]
+    assert abs((a + b) / 2 - 1500) < 1e-6
+    # 75 % score is about 190 Elo, the prior draw pulls it a little closer
+    assert 150 < a - b < 191
+    assert a_low < a < a_high and b_low < b < b_high
+    # unbeaten players keep finite ratings
+    assert compute_elo([result("a", "b", "a")] * 5, ["a", "b"])["a"][0] < 2500
+
+
+def test_run_tournament_resumes(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    players = {"random": "random", "first": FirstMovePlayer, "mcts": "mcts:10"}
+    report = run_tournament(players, path, games_per_pair=2, workers=0)
+    assert len(report.results) == 6
+    assert sum(report.points.values()) == 6
+    assert report.games_per_sec > 0
+    assert all(latency > 0 for latency in report.move_latency.values())
+    with open(path) as results_file:
+        lines = [json.loads(line) for line in results_file]
+    assert sorted(line["id"] for line in lines) == list(range(6))
+
+    again = run_tournament(players, path, games_per_pair=2, workers=1)
+    assert len(again.results) == 6 and again.games_per_sec == 0
+
+
+def test_run_tournament_ignores_other_matches(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    run_tournament({"a": "random", "b": FirstMovePlayer}, path, workers=0)
+    # b was dropped, its results stay in the file but don't count
+    report = run_tournament({"a": "random", "c": FirstMovePlayer}, path, workers=0)
+    assert len(report.results) == 2
+    assert all("b" not in (r.first, r.second) for r in report.results)
+
+    # another seed schedules other matches
+    report = run_tournament(
+        {"a": "random", "c": FirstMovePlayer}, path, seed=7, workers=0
+    )
+    assert len(report.results) == 2 and report.games_per_sec > 0
+    with open(path) as results_file:
+        assert len(results_file.readlines()) == 6
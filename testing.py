@@ -0,0 +1,43 @@
+"""Seeded random positions shared by the tests"""
+import random
+from typing import Iterator, Optional
+
+from board import Board
+from engine import BitBoard
+
+
+def play_random(position, rng: random.Random, plies: Optional[int] = None):
+    """Push up to plies random legal moves, fewer if the game ends.
+
+    Arguments:
+        position -- Board or BitBoard, changed in place
+        rng {random.Random} -- source of the moves
+
+    Keyword Arguments:
+        plies {int} -- number of moves, None plays to the end of the game
+                       (default: {None})
+
+    Returns:
+        Board or BitBoard -- the position
+    """
+    engine = position if isinstance(position, BitBoard) else position.engine
+    ply = 0
+    while (plies is None or ply < plies) and not engine.is_over():
+        if isinstance(position, BitBoard):
+            position.push(rng.choice(position.legal_moves()))
+        else:
+            position.push(*rng.choice(position.legal_moves()))
+        ply += 1
+    return position
+
+
+def random_boards(
+    count: int, seed: int = 0, max_plies: Optional[int] = 60
+) -> Iterator[Board]:
+    """Boards of random games after a random number of moves below
+        max_plies, complete games if max_plies is None.
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        plies = None if max_plies is None else rng.randrange(max_plies)
+        yield play_random(Board(), rng, plies)
@@ -0,0 +1,383 @@
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import combinations
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from board import Board, IllegalMoveError
+from selfplay import make_bot
+
+# A player is a bot spec for selfplay.make_bot or a picklable factory
+# factory(seed, time_limit) which returns a player callable.
+PlayerSpec = Union[str, Callable]
+
+ELO_SCALE = 400 / math.log(10)
+
+
+class Match(NamedTuple):
+    """A scheduled game, first moves first
+
+    id {int} -- match number
+    first {str} -- name of the player which moves first
+    second {str} -- name of the other player
+    seed {int} -- seed of the players
+    """
+
+    id: int
+    first: str
+    second: str
+    seed: int
+
+
+class MatchResult(NamedTuple):
+    """Result of a match
+
+    id {int} -- match number
+    first {str} -- name of the player which moved first
+    second {str} -- name of the other player
+    seed {int} -- seed of the players
+    winner {str} -- name of the winner, None for a draw
+    reason {str} -- "win", "draw", "illegal" (the loser played an illegal
+                    move) or "time" (the loser exceeded the move time)
+    moves {int} -- number of moves
+    seconds {float} -- time of the game
+    move_seconds {Dict[str, float]} -- thinking time per player
+    move_counts {Dict[str, int]} -- moves per player
+    """
+
+    id: int
+    first: str
+    second: str
+    seed: int
+    winner: Optional[str]
+    reason: str
+    moves: int
+    seconds: float
+    move_seconds: Dict[str, float]
+    move_counts: Dict[str, int]
+
+
+def round_robin(names: List[str], games_per_pair: int, seed: int = 0) -> List[Match]:
+    """Every pair of players plays games_per_pair games with alternating
+        first move.
+    """
+    matches = []
+    for a, b in combinations(names, 2):
+        for game in range(games_per_pair):
+            first, second = (a, b) if game % 2 == 0 else (b, a)
+            matches.append(Match(len(matches), first, second, seed + len(matches)))
+    return matches
+
+
+def _make_player(spec: PlayerSpec, seed: int, time_limit: Optional[float]):
+    if isinstance(spec, str):
+        return make_bot(spec, seed, time_limit)
+    return spec(seed, time_limit)
+
+
+def play_match(
+    match: Match,
+    players: Dict[str, PlayerSpec],
+    move_time: float = None,
+    grace: float = 0.5,
+) -> MatchResult:
+    """Play a match on a Board.
+
+    Arguments:
+        match {Match} -- the match
+        players {Dict[str, PlayerSpec]} -- player spec per name
+
+    Keyword Arguments:
+        move_time {float} -- seconds per move, passed to the players
+                             (default: {None})
+        grace {float} -- a player loses on time if a move takes longer than
+                         move_time + grace seconds (default: {0.5})
+
+    Returns:
+        MatchResult -- winner and timings
+    """
+    names = (match.first, match.second)
+    rng = random.Random(match.seed)
+    bots = [
+        _make_player(players[name], rng.randrange(2 ** 32), move_time)
+        for name in names
+    ]
+    board = Board()
+    labels = (board.playerA, board.playerB)
+    move_seconds = {name: 0.0 for name in names}
+    move_counts = {name: 0 for name in names}
+    start = time.perf_counter()
+    winner, reason, side = None, "draw", 0
+    while board.legal_moves():
+        name = names[side]
+        move_start = time.perf_counter()
+        move = bots[side](board)
+        seconds = time.perf_counter() - move_start
+        move_seconds[name] += seconds
+        move_counts[name] += 1
+        if move_time is not None and seconds > move_time + grace:
+            winner, reason = names[1 - side], "time"
+            break
+        try:
+            won = board.next_move(move[0], move[1], labels[side])
+        except (IllegalMoveError, TypeError, IndexError):
+            winner, reason = names[1 - side], "illegal"
+            break
+        if won is not None:
+            winner, reason = name, "win"
+            break
+        side = 1 - side
+    return MatchResult(
+        match.id,
+        match.first,
+        match.second,
+        match.seed,
+        winner,
+        reason,
+        len(board.insertion_order),
+        time.perf_counter() - start,
+        move_seconds,
+        move_counts,
+    )
+
+
+def compute_elo(
+    results: List[MatchResult],
+    names: List[str],
+    anchor: float = 1500.0,
+    prior_draws: float = 1.0,
+) -> Dict[str, Tuple[float, float, float]]:
+    """Maximum likelihood Elo ratings (Bradley-Terry) with 95% confidence
+        intervals from the Fisher information.
+
+    Arguments:
+        results {List[MatchResult]} -- finished matches
+        names {List[str]} -- all players
+
+    Keyword Arguments:
+        anchor {float} -- mean rating (default: {1500.0})
+        prior_draws {float} -- virtual draws per pair which keep the
+                               ratings of unbeaten players finite
+                               (default: {1.0})
+
+    Returns:
+        Dict[str, Tuple[float, float, float]] -- (rating, lower, upper) per
+                                                 player
+    """
+    index = {name: i for i, name in enumerate(names)}
+    n = len(names)
+    games = [[0.0] * n for _ in range(n)]
+    score = [0.0] * n
+    for i, j in combinations(range(n), 2):
+        games[i][j] = games[j][i] = prior_draws
+        score[i] += prior_draws / 2
+        score[j] += prior_draws / 2
+    for result in results:
+        a, b = index[result.first], index[result.second]
+        games[a][b] += 1
+        games[b][a] += 1
+        if result.winner is None:
+            score[a] += 0.5
+            score[b] += 0.5
+        else:
+            score[index[result.winner]] += 1
+
+    # Newton steps per player on the log-likelihood, ratings in natural
+    # log-odds units
+    ratings = [0.0] * n
+    information = [0.0] * n
+    for _ in range(200):
+        change = 0.0
+        for i in range(n):
+            expected = information[i] = 0.0
+            for j in range(n):
+                if games[i][j]:
+                    p = 1 / (1 + math.exp(ratings[j] - ratings[i]))
+                    expected += games[i][j] * p
+                    information[i] += games[i][j] * p * (1 - p)
+            if information[i]:
+                step = (score[i] - expected) / information[i]
+                ratings[i] += step
+                change = max(change, abs(step))
+        mean = sum(ratings) / n if n else 0.0
+        ratings = [rating - mean for rating in ratings]
+        if change < 1e-9:
+            break
+
+    elo = {}
+    for name, i in index.items():
+        rating = anchor + ELO_SCALE * ratings[i]
+        margin = (
+            1.96 * ELO_SCALE / math.sqrt(information[i])
+            if information[i]
+            else float("inf")
+        )
+        elo[name] = (rating, rating - margin, rating + margin)
+    return elo
+
+
+class TournamentReport(NamedTuple):
+    """Summary of a tournament
+
+    results {List[MatchResult]} -- all finished matches, also the ones of
+                                   an earlier run of the same results file
+    elo {Dict[str, Tuple[float, float, float]]} -- (rating, lower, upper)
+    points {Dict[str, float]} -- points per player, 1 per win, 0.5 per draw
+    games_per_sec {float} -- games of this run per second of wall time
+    move_latency {Dict[str, float]} -- mean seconds per move per player
+    seconds {float} -- wall time of this run
+    """
+
+    results: List[MatchResult]
+    elo: Dict[str, Tuple[float, float, float]]
+    points: Dict[str, float]
+    games_per_sec: float
+    move_latency: Dict[str, float]
+    seconds: float
+
+
+def match_key(match: Union[Match, MatchResult]) -> Tuple[str, str, int]:
+    """Identity of a match across runs: the players and their seed"""
+    return match.first, match.second, match.seed
+
+
+def _read_results(path: str, matches: List[Match]) -> List[MatchResult]:
+    """Results of the file which belong to one of the matches, one per
+        match. Results of other player sets, seeds or numbers of games and
+        lines of another format are ignored.
+    """
+    scheduled = {match_key(match) for match in matches}
+    results = {}
+    if os.path.exists(path):
+        with open(path) as results_file:
+            for line in results_file:
+                if not line.strip():
+                    continue
+                fields = json.loads(line)
+                if set(fields) != set(MatchResult._fields):
+                    continue
+                result = MatchResult(**fields)
+                if match_key(result) in scheduled:
+                    results.setdefault(match_key(result), result)
+    return list(results.values())
+
+
+def run_tournament(
+    players: Dict[str, PlayerSpec],
+    path: str,
+    games_per_pair: int = 2,
+    move_time: float = None,
+    workers: int = None,
+    seed: int = 0,
+) -> TournamentReport:
+    """Round-robin tournament across a process pool. Every finished match
+        is appended to a JSON lines file at once. Matches whose players and
+        seed are already in the file are not played again, results of
+        other matches in the file are ignored.
+
+    Arguments:
+        players {Dict[str, PlayerSpec]} -- bot spec or factory per name
+        path {str} -- JSON lines results file
+
+    Keyword Arguments:
+        games_per_pair {int} -- games of every pair (default: {2})
+        move_time {float} -- seconds per move (default: {None})
+        workers {int} -- worker processes, the matches are played in this
+                         process if 0 (default: {None})
+        seed {int} -- base seed of the players (default: {0})
+
+    Returns:
+        TournamentReport -- ratings, points and throughput
+    """
+    names = list(players)
+    matches = round_robin(names, games_per_pair, seed)
+    results = _read_results(path, matches)
+    done = {match_key(result) for result in results}
+    pending = [match for match in matches if match_key(match) not in done]
+    played = []
+    start = time.perf_counter()
+    with open(path, "a") as results_file:
+
+        def record(result: MatchResult):
+            results_file.write(json.dumps(result._asdict()) + "\n")
+            results_file.flush()
+            played.append(result)
+
+        if workers == 0:
+            for match in pending:
+                record(play_match(match, players, move_time))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(play_match, match, players, move_time)
+                    for match in pending
+                ]
+                for future in as_completed(futures):
+                    record(future.result())
+    seconds = time.perf_counter() - start
+
+    results.extend(played)
+    points = {name: 0.0 for name in names}
+    move_seconds = {name: 0.0 for name in names}
+    move_counts = {name: 0 for name in names}
+    for result in results:
+        if result.winner is None:
+            points[result.first] += 0.5
+            points[result.second] += 0.5
+        else:
+            points[result.winner] += 1
+        for name in (result.first, result.second):
+            move_seconds[name] += result.move_seconds[name]
+            move_counts[name] += result.move_counts[name]
+    return TournamentReport(
+        results,
+        compute_elo(results, names),
+        points,
+        len(played) / seconds if seconds else 0.0,
+        {
+            name: move_seconds[name] / move_counts[name] if move_counts[name] else 0.0
+            for name in names
+        },
+        seconds,
+    )
+
+
+def main(argv: List[str] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Round-robin bot tournament")
+    parser.add_argument("results", help="JSON lines results file")
+    parser.add_argument(
+        "bots", nargs="+", help="bot specs, e.g. random mcts:200 alphabeta:3"
+    )
+    parser.add_argument("--games", type=int, default=2, help="games per pair")
+    parser.add_argument("--move-time", type=float, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = run_tournament(
+        {spec: spec for spec in args.bots},
+        args.results,
+        args.games,
+        args.move_time,
+        args.workers,
+        args.seed,
+    )
+    for name, (rating, lower, upper) in sorted(
+        report.elo.items(), key=lambda item: -item[1][0]
+    ):
+        print(
+            f"{name:<16} {rating:7.1f} [{lower:7.1f}, {upper:7.1f}]  "
+            f"{report.points[name]:5.1f} points  "
+            f"{report.move_latency[name] * 1e3:8.2f} ms/move"
+        )
+    print(f"{len(report.results)} games, {report.games_per_sec:.2f} games/sec")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])